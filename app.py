@@ -3,14 +3,49 @@ Fraud Ring Detection and Visualization
 A Streamlit application for detecting and visualizing fraud rings using Vis.js
 """
 
+import functools
+import hashlib
 import streamlit as st
-import pandas as pd
-from io import StringIO
-import json
-from fraud_detector import FraudRingDetector
-from visjs_template import get_visjs_html, get_empty_state_html
+from pathlib import Path
 import streamlit.components.v1 as components
 
+# Vis.js network component: a stable iframe that updates the graph in place across reruns
+_visjs_graph = components.declare_component(
+    "visjs_graph",
+    path=str(Path(__file__).with_name("visjs_component"))
+)
+
+# Number of data fields in the input grid (3x3)
+NUM_FIELDS = 9
+
+# Graphs with fewer nodes keep physics running after stabilization
+PHYSICS_NODE_LIMIT = 50
+
+# Settings selectbox options -> display labels
+_LAYOUT_LABELS = {
+    'forceAtlas2Based': 'Force Atlas 2 (Organic)',
+    'barnesHut': 'Barnes Hut (Clustered)',
+    'repulsion': 'Repulsion (Spread Out)',
+    'hierarchicalRepulsion': 'Hierarchical Repulsion'
+}
+
+_LAYOUT_STYLE_LABELS = {
+    'free-form': 'Free-Form (Organic)',
+    'UD': 'Hierarchical (Top→Bottom)',
+    'DU': 'Hierarchical (Bottom→Top)',
+    'LR': 'Hierarchical (Left→Right)',
+    'RL': 'Hierarchical (Right→Left)'
+}
+
+_EDGE_STYLE_LABELS = {
+    'dynamic': 'Dynamic',
+    'continuous': 'Continuous',
+    'discrete': 'Discrete',
+    'cubicBezier': 'Cubic Bezier',
+    'straightCross': 'Straight',
+    'curvedCW': 'Curved CW',
+    'curvedCCW': 'Curved CCW'
+}
 
 # Page configuration
 st.set_page_config(
@@ -20,261 +55,287 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Inter font (fallback for non-Apple platforms), loaded via link tags instead of a render-blocking @import
+FONT_LINKS = (
+    '<link rel="preconnect" href="https://fonts.googleapis.com">'
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+    '<link rel="preload" as="style" href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap">'
+    '<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap">'
+)
+
+
+@st.cache_data
+def _css():
+    """Read the app stylesheet once (cached across reruns and sessions)."""
+    return Path(__file__).with_name('style.css').read_text()
+
+
 # Custom CSS - Apple-like design
-st.markdown("""
-    <style>
-    /* Import SF Pro Display font (Apple's system font) */
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    /* Global styling */
-    * {
-        font-family: -apple-system, BlinkMacSystemFont, 'Inter', 'Segoe UI', Roboto, sans-serif;
-    }
-    
-    .main {
-        padding: 2rem 3rem;
-        background: linear-gradient(to bottom, #fafafa 0%, #ffffff 100%);
-    }
-    
-    /* Title styling */
-    h1 {
-        text-align: center;
-        color: #1d1d1f;
-        font-weight: 600;
-        font-size: 3rem;
-        letter-spacing: -0.5px;
-        margin-bottom: 0.5rem;
-    }
-    
-    h2, h3 {
-        color: #1d1d1f;
-        font-weight: 600;
-        letter-spacing: -0.3px;
-    }
-    
-    /* Input fields - Light mode */
-    .stTextInput > div > div > input,
-    .stTextArea > div > div > textarea {
-        border-radius: 12px;
-        border: 1px solid #d2d2d7;
-        padding: 12px 16px;
-        font-size: 15px;
-        background: #ffffff !important;
-        color: #1d1d1f !important;
-        transition: all 0.2s ease;
-    }
-    
-    .stTextInput > div > div > input:focus,
-    .stTextArea > div > div > textarea:focus {
-        border-color: #0071e3 !important;
-        box-shadow: 0 0 0 4px rgba(0, 113, 227, 0.1) !important;
-    }
-    
-    .stTextInput > label, .stTextArea > label {
-        font-weight: 500;
-        color: #1d1d1f;
-        font-size: 14px;
-        margin-bottom: 8px;
-    }
-    
-    /* Dark mode support */
-    [data-theme="dark"] .stTextInput > div > div > input,
-    [data-theme="dark"] .stTextArea > div > div > textarea {
-        background: #1e1e1e !important;
-        color: #ffffff !important;
-        border: 1px solid #3d3d3d !important;
-    }
-    
-    [data-theme="dark"] .stTextInput > label,
-    [data-theme="dark"] .stTextArea > label {
-        color: #ffffff !important;
-    }
-    
-    [data-theme="dark"] h1,
-    [data-theme="dark"] h2,
-    [data-theme="dark"] h3 {
-        color: #ffffff !important;
-    }
-    
-    [data-theme="dark"] .main {
-        background: linear-gradient(to bottom, #0e1117 0%, #1e1e1e 100%) !important;
-    }
-    
-    /* Buttons */
-    .stButton > button {
-        border-radius: 12px;
-        padding: 12px 24px;
-        font-weight: 500;
-        font-size: 15px;
-        letter-spacing: -0.2px;
-        border: none;
-        transition: all 0.2s ease;
-        box-shadow: 0 2px 8px rgba(0, 0, 0, 0.08);
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-1px);
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.12);
-    }
-    
-    .stButton > button[kind="primary"] {
-        background: linear-gradient(135deg, #0071e3 0%, #005bb5 100%);
-        color: white;
-    }
-    
-    .stButton > button[kind="primary"]:hover {
-        background: linear-gradient(135deg, #005bb5 0%, #004a99 100%);
-    }
-    
-    /* Select boxes and number inputs */
-    .stSelectbox > div > div,
-    .stNumberInput > div > div {
-        border-radius: 12px;
-        border: 1px solid #d2d2d7;
-        background: #ffffff !important;
-        color: #1d1d1f !important;
-    }
-    
-    [data-theme="dark"] .stSelectbox > div > div,
-    [data-theme="dark"] .stNumberInput > div > div {
-        background: #1e1e1e !important;
-        color: #ffffff !important;
-        border: 1px solid #3d3d3d !important;
-    }
-    
-    [data-theme="dark"] .stSelectbox label,
-    [data-theme="dark"] .stNumberInput label {
-        color: #ffffff !important;
-    }
-    
-    /* Sliders */
-    .stSlider > div > div > div {
-        background: #d2d2d7;
-    }
-    
-    .stSlider > div > div > div > div {
-        background: #0071e3;
-    }
-    
-    /* Checkbox */
-    .stCheckbox > label {
-        font-weight: 400;
-        color: #1d1d1f;
-    }
-    
-    [data-theme="dark"] .stCheckbox > label {
-        color: #ffffff !important;
-    }
-    
-    /* Markdown and text */
-    .markdown-text-container {
-        color: #6e6e73;
-        line-height: 1.6;
-    }
-    
-    [data-theme="dark"] .markdown-text-container,
-    [data-theme="dark"] p,
-    [data-theme="dark"] span {
-        color: #e0e0e0 !important;
-    }
-    
-    /* Dividers */
-    hr {
-        border: none;
-        height: 1px;
-        background: linear-gradient(to right, transparent, #d2d2d7, transparent);
-        margin: 2rem 0;
-    }
-    
-    /* Info/Success/Warning boxes */
-    .stAlert {
-        border-radius: 12px;
-        border: 1px solid #d2d2d7;
-        padding: 16px 20px;
-        background: #f5f5f7;
-    }
-    
-    [data-theme="dark"] .stAlert {
-        background: #1e1e1e !important;
-        border: 1px solid #3d3d3d !important;
-        color: #ffffff !important;
-    }
-    
-    /* Expander */
-    .streamlit-expanderHeader {
-        border-radius: 12px;
-        background: #f5f5f7;
-        font-weight: 500;
-        color: #1d1d1f;
-    }
-    
-    [data-theme="dark"] .streamlit-expanderHeader {
-        background: #1e1e1e !important;
-        color: #ffffff !important;
-    }
-    
-    /* Card-like sections */
-    div[data-testid="column"] {
-        background: transparent;
-    }
-    
-    /* Remove Streamlit branding colors */
-    .css-1d391kg, .css-1v3fvcr {
-        background: transparent;
-    }
-    
-    /* Tooltips */
-    .stTooltipIcon {
-        color: #86868b;
-    }
-    
-    /* Multiselect */
-    .stMultiSelect > div > div {
-        border-radius: 12px;
-        border: 1px solid #d2d2d7;
-        background: #ffffff !important;
-        color: #1d1d1f !important;
-    }
-    
-    [data-theme="dark"] .stMultiSelect > div > div {
-        background: #1e1e1e !important;
-        color: #ffffff !important;
-        border: 1px solid #3d3d3d !important;
-    }
-    
-    [data-theme="dark"] .stMultiSelect label {
-        color: #ffffff !important;
-    }
-    
-    /* Subtle animations */
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(10px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    .element-container {
-        animation: fadeIn 0.3s ease-out;
+st.markdown(f"{FONT_LINKS}<style>{_css()}</style>", unsafe_allow_html=True)
+
+
+def _digest_field_data(field_data):
+    """Compute a compact content digest of the field data, used as the cache key."""
+    h = hashlib.blake2b(digest_size=16)
+    for key in sorted(field_data):
+        values = field_data[key]
+        # Length-framed: the key, then every value's length, then the values back to back,
+        # so no choice of separators in the data can make two inputs hash alike
+        h.update(f"{len(key)}:{key}{len(values)}:".encode())
+        h.update(','.join(map(str, map(len, values))).encode())
+        h.update(b';')
+        h.update(''.join(values).encode())
+    return h.hexdigest()
+
+
+@st.cache_data(persist="disk", show_spinner=False, max_entries=32)
+def _run_detection(digest, _field_data, field_names, display_names):
+    """Run fraud detection, persisted to disk so reloads and other sessions with the same inputs skip it."""
+    # Imported lazily: pandas is only needed once the user runs an analysis
+    from fraud_detector import FraudRingDetector
+    
+    detector = FraudRingDetector(field_names=list(field_names))
+    # Set before processing so tooltips, edge labels and the legend all use them
+    detector.field_display_names = dict(display_names)
+    detector.process_data(_field_data)
+    return detector
+
+
+@st.cache_resource(ttl=3600, max_entries=32)
+def _build_detector(digest, _field_data, field_names, display_names):
+    """
+    Cached detector, returned by reference (no pickling) and keyed on the data digest.
+    
+    The instance is shared by every session with the same inputs, so it is treated
+    as read-only; anything session-specific (like display names) is part of the key.
+    """
+    return _run_detection(digest, _field_data, field_names, display_names)
+
+
+@st.cache_data(ttl=3600, max_entries=32)
+def _compute_graph(_detector, digest, field_names, display_names):
+    """Cached graph data (plain nodes/edges lists) for an already processed detector."""
+    return {
+        'nodes': _detector.nodes,
+        'edges': _detector.edges
     }
-    </style>
-""", unsafe_allow_html=True)
 
 
-@st.cache_data(ttl=3600)
-def process_fraud_detection(field_data, field_names):
-    """Cached function to process fraud detection."""
-    detector = FraudRingDetector(field_names=field_names)
-    graph_data = detector.process_data(field_data)
+def process_fraud_detection(field_data, field_names, display_names=None):
+    """Cached function to process fraud detection (display_names: internal key -> label)."""
+    digest = _digest_field_data(field_data)
+    field_names = tuple(field_names)
+    display_names = tuple(sorted((display_names or {}).items()))
+    detector = _build_detector(digest, field_data, field_names, display_names)
+    graph_data = _compute_graph(detector, digest, field_names, display_names)
     return detector, graph_data
 
 
-def parse_input_data(text_input):
-    """Parse text input into a list, handling multiple formats."""
-    if not text_input or text_input.strip() == '':
-        return []
+@functools.lru_cache(maxsize=128)
+def _internal_key(name):
+    """Convert a display field name to its internal key (e.g. 'IP Address' -> 'ip_address')."""
+    return name.lower().replace(' ', '_')
+
+
+# Separator line between fields when parsing all inputs in one buffer
+_FIELD_SEPARATOR = '\x1f'
+
+
+def parse_input_fields(text_inputs):
+    """
+    Parse a list of text inputs into one list of values per input.
+    
+    All inputs are joined into a single buffer and split once, which is cheaper
+    than splitting each text area separately. The separator line is lengthened
+    until it occurs in none of the inputs, so pasted data can't be mistaken for
+    it. Lines are stripped and blank lines dropped; \n, \r\n and \r line
+    endings are all handled.
+    """
+    texts = [text or '' for text in text_inputs]
+    separator = _FIELD_SEPARATOR
+    while any(separator in text for text in texts):
+        separator += _FIELD_SEPARATOR
+    
+    parsed = [[]]
+    for raw in f'\n{separator}\n'.join(texts).splitlines():
+        if raw == separator:
+            parsed.append([])
+            continue
+        line = raw.strip()
+        if line:
+            parsed[-1].append(line)
+    return parsed
+
+
+def _render_results(detector, graph_data):
+    """Render the settings panel and the fraud ring network for an analyzed dataset."""
+    st.markdown("---")
+    
+    # Get available features from detector for initial defaults
+    available_features = detector.all_fields
+    
+    # Settings Section - before the visualization so it picks up applied values
+    st.markdown("### Settings")
+    
+    # Settings are batched in a form so slider drags don't re-embed the graph on every tick
+    with st.form("viz_settings", border=False):
+        # Layout algorithm selector
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            layout_algorithm = st.selectbox(
+                "Physics Algorithm",
+                options=list(_LAYOUT_LABELS),
+                index=list(_LAYOUT_LABELS).index(st.session_state.layout_algorithm),
+                format_func=_LAYOUT_LABELS.__getitem__,
+                help="Physics algorithm for node positioning",
+                key="layout_select"
+            )
+            st.session_state.layout_algorithm = layout_algorithm
+        
+        with col2:
+            layout_style = st.selectbox(
+                "Layout Style",
+                options=list(_LAYOUT_STYLE_LABELS),
+                index=0 if 'layout_style' not in st.session_state else list(_LAYOUT_STYLE_LABELS).index(st.session_state.layout_style),
+                format_func=_LAYOUT_STYLE_LABELS.__getitem__,
+                help="Overall layout structure",
+                key="layout_style_select"
+            )
+            st.session_state.layout_style = layout_style
+            
+            # Barnes-Hut approximation: trade layout accuracy for speed
+            solver_theta = st.slider(
+                "Simulation Speed (θ)",
+                min_value=0.3,
+                max_value=1.0,
+                value=st.session_state.solver_theta,
+                step=0.1,
+                help="Higher is faster but less accurate (Force Atlas 2 and Barnes Hut only)",
+                key="solver_theta_slider"
+            )
+            st.session_state.solver_theta = solver_theta
+        
+        st.markdown("#### Edge Visualization")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # Edge smoothing/routing
+            edge_smooth_type = st.selectbox(
+                "Edge Style",
+                options=list(_EDGE_STYLE_LABELS),
+                index=list(_EDGE_STYLE_LABELS).index(st.session_state.edge_smooth_type),
+                format_func=_EDGE_STYLE_LABELS.__getitem__,
+                key="edge_style_select"
+            )
+            st.session_state.edge_smooth_type = edge_smooth_type
+        
+            # Edge opacity
+            edge_opacity = st.slider(
+                "Edge Transparency",
+                min_value=0.1,
+                max_value=1.0,
+                value=st.session_state.edge_opacity,
+                step=0.1,
+                key="edge_opacity_slider"
+            )
+            st.session_state.edge_opacity = edge_opacity
+        
+        with col2:
+            # Edge filtering by weight
+            min_edge_weight = st.number_input(
+                "Minimum Shared Features",
+                min_value=1,
+                max_value=10,
+                value=st.session_state.min_edge_weight,
+                step=1,
+                key="min_edge_input"
+            )
+            st.session_state.min_edge_weight = min_edge_weight
+        
+            # Show edge labels toggle
+            show_edge_labels = st.checkbox(
+                "Show Edge Labels",
+                value=st.session_state.show_edge_labels,
+                key="edge_labels_check"
+            )
+            st.session_state.show_edge_labels = show_edge_labels
+        
+        st.form_submit_button("Apply")
+    
+    st.markdown("---")
+    st.markdown("### Fraud Ring Network")
+    
+    # Read applied settings once (each session_state access goes through Streamlit's proxy)
+    ss = st.session_state
+    chart_title = ss.chart_title
+    layout_algorithm = ss.layout_algorithm
+    layout_style = ss.layout_style
+    edge_smooth_type = ss.edge_smooth_type
+    edge_opacity = ss.edge_opacity
+    min_edge_weight = ss.min_edge_weight
+    show_edge_labels = ss.show_edge_labels
+    solver_theta = ss.solver_theta
+    
+    # Apply filter with current session state values (show all feature types)
+    filtered_data = detector.filter_graph(
+        min_risk=0,
+        feature_types=None  # Show all features
+    )
+    
+    # Network visualization
+    if len(filtered_data['nodes']) == 0:
+        st.warning("No entities match the current filter criteria.")
+    else:
+        # Imported lazily, only needed once there are results to show
+        from visjs_template import get_visjs_html, get_visjs_graph
+        
+        # Physics always stabilizes the layout; only small graphs keep it running afterwards
+        num_nodes = len(filtered_data['nodes'])
+        physics_enabled = num_nodes < PHYSICS_NODE_LIMIT
+        
+        # Fewer stabilization iterations for larger graphs (each iteration is O(N log N))
+        stabilization_iterations = int(max(50, min(1000, 20000 // max(num_nodes, 1))))
+        
+        # Generate and display visualization with field colors
+        field_colors = detector.get_field_colors() if hasattr(detector, 'get_field_colors') else None
+        
+        # Use selected layout style (hierarchical optional, not forced)
+        use_hierarchical = layout_style if layout_style != 'free-form' else False
+        
+        # Page chrome only (no data); the component reloads it only when it changes.
+        # Its CSS/JS are served (and browser-cached) from the component directory.
+        shell_html = get_visjs_html(
+            [],
+            [],
+            height=700,
+            field_colors=field_colors,
+            chart_title=chart_title,
+            use_hierarchical=use_hierarchical,
+            inline_assets=False
+        )
+        
+        # Data and options, applied in place to the existing network on reruns
+        graph = get_visjs_graph(
+            filtered_data['nodes'],
+            filtered_data['edges'],
+            physics_enabled=physics_enabled,
+            layout_algorithm=layout_algorithm,
+            edge_smooth_type=edge_smooth_type,
+            edge_opacity=edge_opacity,
+            min_edge_weight=min_edge_weight,
+            show_edge_labels=show_edge_labels,
+            use_hierarchical=use_hierarchical,
+            stabilization_iterations=stabilization_iterations,
+            solver_theta=solver_theta
+        )
+        
+        _visjs_graph(shell=shell_html, graph=graph, height=750, key="fraud_net", default=None)
     
-    # Split by newlines and clean up
-    lines = [line.strip() for line in text_input.strip().split('\n')]
-    return [line for line in lines if line]
+    # Show filter results
+    if len(filtered_data['nodes']) < len(graph_data['nodes']):
+        st.info(f"Showing {len(filtered_data['nodes'])} of {len(graph_data['nodes'])} entities and {len(filtered_data['edges'])} of {len(graph_data['edges'])} connections")
 
 
 def main():
@@ -307,6 +368,8 @@ def main():
         st.session_state.min_edge_weight = 1
     if 'show_edge_labels' not in st.session_state:
         st.session_state.show_edge_labels = False
+    if 'solver_theta' not in st.session_state:
+        st.session_state.solver_theta = 0.5
     
     # Centered Title
     st.markdown("<h1>🕸️ Fraud Ring Detection & Visualization</h1>", unsafe_allow_html=True)
@@ -329,320 +392,95 @@ def main():
     st.subheader("Data Input")
     st.markdown("*Enter at least 2 fields (first field + one more)*")
     
-    # Store field data
-    field_data = {}
-    
-    # Row 1
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        field_name = st.text_input("Field Name:", value=st.session_state.field_names[0], key="name_0")
-        st.session_state.field_names[0] = field_name
-        field_input = st.text_area(
-            f"{field_name} *",
-            height=130,
-            key="field_0",
-            placeholder="One per line (REQUIRED)",
-            label_visibility="collapsed"
-        )
-        field_data[field_name.lower().replace(' ', '_')] = parse_input_data(field_input)
-    
-    with col2:
-        field_name = st.text_input("Field Name:", value=st.session_state.field_names[1], key="name_1")
-        st.session_state.field_names[1] = field_name
-        field_input = st.text_area(
-            field_name,
-            height=130,
-            key="field_1",
-            placeholder="One per line (optional)",
-            label_visibility="collapsed"
-        )
-        field_data[field_name.lower().replace(' ', '_')] = parse_input_data(field_input)
-    
-    with col3:
-        field_name = st.text_input("Field Name:", value=st.session_state.field_names[2], key="name_2")
-        st.session_state.field_names[2] = field_name
-        field_input = st.text_area(
-            field_name,
-            height=130,
-            key="field_2",
-            placeholder="One per line (optional)",
-            label_visibility="collapsed"
-        )
-        field_data[field_name.lower().replace(' ', '_')] = parse_input_data(field_input)
-    
-    # Row 2
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        field_name = st.text_input("Field Name:", value=st.session_state.field_names[3], key="name_3")
-        st.session_state.field_names[3] = field_name
-        field_input = st.text_area(
-            field_name,
-            height=130,
-            key="field_3",
-            placeholder="One per line (optional)",
-            label_visibility="collapsed"
-        )
-        field_data[field_name.lower().replace(' ', '_')] = parse_input_data(field_input)
-    
-    with col2:
-        field_name = st.text_input("Field Name:", value=st.session_state.field_names[4], key="name_4")
-        st.session_state.field_names[4] = field_name
-        field_input = st.text_area(
-            field_name,
-            height=130,
-            key="field_4",
-            placeholder="One per line (optional)",
-            label_visibility="collapsed"
-        )
-        field_data[field_name.lower().replace(' ', '_')] = parse_input_data(field_input)
-    
-    with col3:
-        field_name = st.text_input("Field Name:", value=st.session_state.field_names[5], key="name_5")
-        st.session_state.field_names[5] = field_name
-        field_input = st.text_area(
-            field_name,
-            height=130,
-            key="field_5",
-            placeholder="One per line (optional)",
-            label_visibility="collapsed"
-        )
-        field_data[field_name.lower().replace(' ', '_')] = parse_input_data(field_input)
-    
-    # Row 3
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        field_name = st.text_input("Field Name:", value=st.session_state.field_names[6], key="name_6")
-        st.session_state.field_names[6] = field_name
-        field_input = st.text_area(
-            field_name,
-            height=130,
-            key="field_6",
-            placeholder="One per line (optional)",
-            label_visibility="collapsed"
-        )
-        field_data[field_name.lower().replace(' ', '_')] = parse_input_data(field_input)
-    
-    with col2:
-        field_name = st.text_input("Field Name:", value=st.session_state.field_names[7], key="name_7")
-        st.session_state.field_names[7] = field_name
-        field_input = st.text_area(
-            field_name,
-            height=130,
-            key="field_7",
-            placeholder="One per line (optional)",
-            label_visibility="collapsed"
-        )
-        field_data[field_name.lower().replace(' ', '_')] = parse_input_data(field_input)
+    # Field keys and raw text, parsed together once the grid is rendered
+    field_keys = []
+    field_inputs = []
+    
+    # Precompute per-field labels so the grid below is a single loop
+    required_flags = [True] + [False] * (NUM_FIELDS - 1)
+    placeholders = ["One per line (REQUIRED)"] + ["One per line (optional)"] * (NUM_FIELDS - 1)
+    
+    # Inputs live in a form so edits are batched into a single rerun on submit
+    with st.form("inputs", clear_on_submit=False, border=False):
+        # 3x3 grid: row by row, three fields per row
+        for row in range(NUM_FIELDS // 3):
+            cols = st.columns(3)
+            for c in range(3):
+                idx = row * 3 + c
+                with cols[c]:
+                    field_name = st.text_input("Field Name:", value=st.session_state.field_names[idx], key=f"name_{idx}")
+                    st.session_state.field_names[idx] = field_name
+                    field_input = st.text_area(
+                        f"{field_name} *" if required_flags[idx] else field_name,
+                        height=130,
+                        key=f"field_{idx}",
+                        placeholder=placeholders[idx],
+                        label_visibility="collapsed"
+                    )
+                    field_keys.append(_internal_key(field_name))
+                    field_inputs.append(field_input)
+        
+        st.markdown("---")
+        
+        # Analyze button (centered)
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col2:
+            analyze_button = st.form_submit_button(
+                "🔍 Detect Fraud Rings",
+                type="primary",
+                use_container_width=True
+            )
     
-    with col3:
-        field_name = st.text_input("Field Name:", value=st.session_state.field_names[8], key="name_8")
-        st.session_state.field_names[8] = field_name
-        field_input = st.text_area(
-            field_name,
-            height=130,
-            key="field_8",
-            placeholder="One per line (optional)",
-            label_visibility="collapsed"
-        )
-        field_data[field_name.lower().replace(' ', '_')] = parse_input_data(field_input)
+    # Store field data (and track required-data flags while we go)
+    field_data = {}
+    client_has_data = False
+    other_has_data = False
     
-    st.markdown("---")
+    for idx, (key, values) in enumerate(zip(field_keys, parse_input_fields(field_inputs))):
+        field_data[key] = values
+        if values:
+            if idx == 0:
+                client_has_data = True
+            else:
+                other_has_data = True
     
     # Check if required data provided (client_id + at least 1 more field)
-    client_id_key = st.session_state.field_names[0].lower().replace(' ', '_')
-    has_client_id = len(field_data.get(client_id_key, [])) > 0
+    has_required_data = client_has_data and other_has_data
     
-    # Count how many fields have data
-    fields_with_data = sum(1 for v in field_data.values() if len(v) > 0)
-    has_required_data = has_client_id and fields_with_data >= 2
-    
-    # Analyze button (centered)
-    col1, col2, col3 = st.columns([1, 1, 1])
-    with col2:
-        analyze_button = st.button(
-            "🔍 Detect Fraud Rings",
-            type="primary",
-            use_container_width=True,
-            disabled=not has_required_data
-        )
-        
-        if st.session_state.analyzed:
-            if st.button("🔄 Start Over", use_container_width=True):
-                st.session_state.analyzed = False
-                st.session_state.detector = None
-                st.session_state.graph_data = None
-                st.rerun()
+    if analyze_button and not has_required_data:
+        st.warning("Enter data for the first field and at least one other field.")
+        analyze_button = False
     
     if analyze_button:
         # Convert field names for detector
-        field_names_internal = [name.lower().replace(' ', '_') for name in st.session_state.field_names]
+        field_names_internal = [_internal_key(name) for name in st.session_state.field_names]
         
-        # Store display names mapping for detector
-        display_names_map = {name.lower().replace(' ', '_'): name for name in st.session_state.field_names}
+        # Display names for the detector's tooltips and legend (part of the cache key)
+        display_names_map = {_internal_key(name): name for name in st.session_state.field_names}
         
         with st.spinner("🔍 Analyzing data and detecting fraud rings..."):
             try:
-                detector, graph_data = process_fraud_detection(field_data, field_names_internal)
-                # Store display names in detector for legend
-                detector.field_display_names = display_names_map
+                detector, graph_data = process_fraud_detection(field_data, field_names_internal, display_names_map)
                 
                 st.session_state.detector = detector
                 st.session_state.graph_data = graph_data
                 st.session_state.analyzed = True
                 st.success(f"✅ Analysis complete! Found {len(graph_data['nodes'])} entities and {len(graph_data['edges'])} connections.")
-                st.rerun()
             except Exception as e:
                 st.error(f"❌ Error during analysis: {str(e)}")
                 st.stop()
     
-    # Show visualization if analyzed
+    # Show visualization if analyzed (rendered in this same run right after analysis)
     if st.session_state.analyzed and st.session_state.detector:
-        st.markdown("---")
-        
-        detector = st.session_state.detector
-        graph_data = st.session_state.graph_data
-        
-        # Get available features from detector for initial defaults
-        available_features = detector.all_fields
-        
-        # Settings Section - MOVED BEFORE VISUALIZATION for auto-reload
-        st.markdown("### Settings")
-        
-        # Layout algorithm selector
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            layout_algorithm = st.selectbox(
-                "Physics Algorithm",
-                options=['forceAtlas2Based', 'barnesHut', 'repulsion', 'hierarchicalRepulsion'],
-                index=['forceAtlas2Based', 'barnesHut', 'repulsion', 'hierarchicalRepulsion'].index(st.session_state.layout_algorithm),
-                format_func=lambda x: {
-                    'forceAtlas2Based': 'Force Atlas 2 (Organic)',
-                    'barnesHut': 'Barnes Hut (Clustered)',
-                    'repulsion': 'Repulsion (Spread Out)',
-                    'hierarchicalRepulsion': 'Hierarchical Repulsion'
-                }[x],
-                help="Physics algorithm for node positioning",
-                key="layout_select"
-            )
-            st.session_state.layout_algorithm = layout_algorithm
-        
+        col1, col2, col3 = st.columns([1, 1, 1])
         with col2:
-            layout_style = st.selectbox(
-                "Layout Style",
-                options=['free-form', 'UD', 'DU', 'LR', 'RL'],
-                index=0 if 'layout_style' not in st.session_state else ['free-form', 'UD', 'DU', 'LR', 'RL'].index(st.session_state.layout_style),
-                format_func=lambda x: {
-                    'free-form': 'Free-Form (Organic)',
-                    'UD': 'Hierarchical (Top→Bottom)',
-                    'DU': 'Hierarchical (Bottom→Top)',
-                    'LR': 'Hierarchical (Left→Right)',
-                    'RL': 'Hierarchical (Right→Left)'
-                }[x],
-                help="Overall layout structure",
-                key="layout_style_select"
-            )
-            st.session_state.layout_style = layout_style
-        
-        st.markdown("#### Edge Visualization")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # Edge smoothing/routing
-            edge_smooth_type = st.selectbox(
-                "Edge Style",
-                options=['dynamic', 'continuous', 'discrete', 'cubicBezier', 'straightCross', 'curvedCW', 'curvedCCW'],
-                index=['dynamic', 'continuous', 'discrete', 'cubicBezier', 'straightCross', 'curvedCW', 'curvedCCW'].index(st.session_state.edge_smooth_type),
-                format_func=lambda x: {
-                    'dynamic': 'Dynamic',
-                    'continuous': 'Continuous',
-                    'discrete': 'Discrete',
-                    'cubicBezier': 'Cubic Bezier',
-                    'straightCross': 'Straight',
-                    'curvedCW': 'Curved CW',
-                    'curvedCCW': 'Curved CCW'
-                }[x],
-                key="edge_style_select"
-            )
-            st.session_state.edge_smooth_type = edge_smooth_type
-            
-            # Edge opacity
-            edge_opacity = st.slider(
-                "Edge Transparency",
-                min_value=0.1,
-                max_value=1.0,
-                value=st.session_state.edge_opacity,
-                step=0.1,
-                key="edge_opacity_slider"
-            )
-            st.session_state.edge_opacity = edge_opacity
-        
-        with col2:
-            # Edge filtering by weight
-            min_edge_weight = st.number_input(
-                "Minimum Shared Features",
-                min_value=1,
-                max_value=10,
-                value=st.session_state.min_edge_weight,
-                step=1,
-                key="min_edge_input"
-            )
-            st.session_state.min_edge_weight = min_edge_weight
-            
-            # Show edge labels toggle
-            show_edge_labels = st.checkbox(
-                "Show Edge Labels",
-                value=st.session_state.show_edge_labels,
-                key="edge_labels_check"
-            )
-            st.session_state.show_edge_labels = show_edge_labels
-        
-        st.markdown("---")
-        st.markdown("### Fraud Ring Network")
-        
-        # Apply filter with current session state values (show all feature types)
-        filtered_data = detector.filter_graph(
-            min_risk=0,
-            feature_types=None  # Show all features
-        )
-        
-        # Network visualization
-        if len(filtered_data['nodes']) == 0:
-            st.warning("No entities match the current filter criteria.")
-        else:
-            # Determine physics based on size
-            physics_enabled = len(filtered_data['nodes']) < 100
-            
-            # Generate and display visualization with field colors
-            field_colors = detector.get_field_colors() if hasattr(detector, 'get_field_colors') else None
-            
-            # Use selected layout style (hierarchical optional, not forced)
-            use_hierarchical = st.session_state.layout_style if st.session_state.layout_style != 'free-form' else False
-            
-            vis_html = get_visjs_html(
-                filtered_data['nodes'],
-                filtered_data['edges'],
-                height=700,
-                physics_enabled=physics_enabled,
-                field_colors=field_colors,
-                chart_title=st.session_state.chart_title,
-                layout_algorithm=st.session_state.layout_algorithm,
-                edge_smooth_type=st.session_state.edge_smooth_type,
-                edge_opacity=st.session_state.edge_opacity,
-                min_edge_weight=st.session_state.min_edge_weight,
-                show_edge_labels=st.session_state.show_edge_labels,
-                use_hierarchical=use_hierarchical
-            )
-            
-            components.html(vis_html, height=750, scrolling=False)
+            if st.button("🔄 Start Over", use_container_width=True):
+                st.session_state.analyzed = False
+                st.session_state.detector = None
+                st.session_state.graph_data = None
+                st.rerun()
         
-        # Show filter results
-        if len(filtered_data['nodes']) < len(graph_data['nodes']):
-            st.info(f"Showing {len(filtered_data['nodes'])} of {len(graph_data['nodes'])} entities and {len(filtered_data['edges'])} of {len(graph_data['edges'])} connections")
+        _render_results(st.session_state.detector, st.session_state.graph_data)
 
 
 if __name__ == "__main__":
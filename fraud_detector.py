@@ -1,11 +1,131 @@
 """
 Fraud Ring Detector - Core matching logic and risk scoring
 """
+import numpy as np
+import os
 import pandas as pd
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
 from typing import List, Dict, Tuple, Any
 import json
 
+try:
+    import orjson
+except ImportError:  # Optional - much faster on large graphs, stdlib json otherwise
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # Optional - only needed for to_arrow()/to_cudf()
+    pa = None
+
+
+def _index_field(codes: np.ndarray, row_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, List[np.ndarray]]:
+    """
+    Group row_ids by category code for one field, keeping codes shared by 2+ rows.
+    
+    Returns:
+        (codes, position of each group's first row, row_ids of each group), with
+        negative codes skipped and row_ids kept in row order within a group
+    """
+    positions = np.flatnonzero(codes >= 0)
+    order = positions[np.argsort(codes[positions], kind='stable')]
+    sorted_codes = codes[order]
+    
+    # Values seen only once can't connect anything - drop them before splitting
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_codes)) + 1]
+    sizes = np.diff(np.r_[starts, len(order)])
+    shared = np.repeat(sizes >= 2, sizes)
+    order, sorted_codes = order[shared], sorted_codes[shared]
+    if not len(order):
+        return sorted_codes, order, []
+    
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_codes)) + 1]
+    return sorted_codes[starts], order[starts], np.split(row_ids[order], starts[1:])
+
+
+def _group_pairs(sizes: np.ndarray, members: np.ndarray, max_group_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Emit the edges of each group of row_ids without a Python loop per pair.
+    
+    Groups up to max_group_size get every pair (in combinations() order), larger
+    ones a star from their first member. Groups of the same size are expanded
+    together as one (groups, size) matrix.
+    
+    Args:
+        sizes: Number of members in each group
+        members: Members of all groups, concatenated in group order
+    
+    Returns:
+        (src, dst, group) arrays, ordered by group and then by pair within the group
+    """
+    offsets = np.r_[0, np.cumsum(sizes)[:-1]]
+    src, dst, group, position = [], [], [], []
+    
+    for size in np.unique(sizes).tolist():
+        group_ids = np.flatnonzero(sizes == size)
+        matrix = members[offsets[group_ids][:, None] + np.arange(size)]
+        if size > max_group_size:
+            left, right = np.zeros(size - 1, dtype=np.int64), np.arange(1, size)
+        else:
+            left, right = np.triu_indices(size, 1)
+        
+        src.append(matrix[:, left].ravel())
+        dst.append(matrix[:, right].ravel())
+        group.append(np.repeat(group_ids, len(left)))
+        position.append(np.tile(np.arange(len(left)), len(group_ids)))
+    
+    if not src:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty
+    
+    src, dst, group, position = (np.concatenate(parts) for parts in (src, dst, group, position))
+    order = np.lexsort((position, group))
+    return src[order], dst[order], group[order]
+
+
+def _popcount(masks: np.ndarray) -> np.ndarray:
+    """Number of set bits in each non-negative integer mask."""
+    if masks.dtype == object:
+        return np.fromiter((bin(mask).count('1') for mask in masks), dtype=np.int64, count=len(masks))
+    if hasattr(np, 'bitwise_count'):  # NumPy 2.0+
+        return np.bitwise_count(masks).astype(np.int64)
+    return np.unpackbits(masks.view(np.uint8).reshape(len(masks), -1), axis=1).sum(axis=1, dtype=np.int64)
+
+
+class _UnionFind:
+    """Weighted quick-union with path compression over integer ids."""
+    
+    def __init__(self, size: int):
+        self.parent = np.arange(size)
+        self.rank = np.zeros(size, dtype=np.int8)
+    
+    def find(self, item: int) -> int:
+        """Return the root id of the set containing item."""
+        parent = self.parent
+        root = item
+        while parent[root] != root:
+            root = parent[root]
+        
+        # Point everything on the path straight at the root
+        while parent[item] != root:
+            parent[item], item = root, parent[item]
+        return int(root)
+    
+    def union(self, a: int, b: int) -> bool:
+        """Merge the sets containing a and b. Returns False if already joined."""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        
+        # Attach the shallower tree under the deeper one
+        if self.rank[root_a] < self.rank[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        if self.rank[root_a] == self.rank[root_b]:
+            self.rank[root_a] += 1
+        return True
+
 
 class FraudRingDetector:
     """
@@ -47,7 +167,19 @@ class FraudRingDetector:
         'affiliate_source': '#34C759' # Apple Green
     }
     
-    def __init__(self, field_names=None):
+    # Node color and risk level by number of feature types connecting it (index = min(n, 3))
+    _COLOR_LUT = (
+        '#E5E5EA',  # Apple System Gray 5 - no connections
+        '#B4E4FF',  # Soft Blue - 1 feature type (Apple light blue)
+        '#88C9FF',  # Medium Blue - 2 feature types (Apple blue)
+        '#007AFF',  # Apple Blue - 3+ feature types (signature Apple blue)
+    )
+    _LEVEL_LUT = ('None', 'Low', 'Medium', 'High')
+    
+    # Cleaned values that mean "no value" and never connect rows
+    _BAD_VALUES = frozenset({'', 'nan', 'none', 'null'})
+    
+    def __init__(self, field_names=None, max_group_size: int = 50):
         """
         Initialize the detector with configurable field names.
         
@@ -55,6 +187,8 @@ class FraudRingDetector:
             field_names: List of field names to use for matching
                         If None, uses default 6 fields
                         Can be any number of fields!
+            max_group_size: Values shared by more rows than this are linked as a star
+                           (first row to each other row) instead of every pair
         """
         self.clients = []
         self.connections = []
@@ -62,6 +196,16 @@ class FraudRingDetector:
         self.edges = []
         self.communities = {}
         
+        # Columnar copies of the nodes and edges, filled in by process_data
+        empty = np.zeros(0, dtype=np.int64)
+        self.node_ids = self.node_risk = empty
+        self.edge_src = self.edge_dst = self.edge_width = empty
+        self.shared_edge = self.shared_field = self.edge_feature_mask = empty
+        self._filter_cache = {}
+        self.ring_edges = []
+        self.large_group_rows = set()
+        self.max_group_size = max_group_size
+        
         # Set field names
         if field_names is None:
             # Default 6 fields
@@ -113,13 +257,14 @@ class FraudRingDetector:
         Process input data and detect fraud rings.
         
         Args:
-            field_data: Dictionary mapping field names to lists of values
+            field_data: Dictionary mapping field names to lists (or any sized sequences) of values
                        e.g., {'client_id': [...], 'device_id': [...], ...}
             
         Returns:
             Dictionary containing nodes and edges for visualization
         """
         # Clean and prepare data
+        self._filter_cache = {}
         df = self._prepare_dataframe(field_data)
         
         # Find matches and build connections
@@ -140,187 +285,273 @@ class FraudRingDetector:
             # Create empty dataframe with columns
             df = pd.DataFrame(columns=['row_id'] + self.all_fields)
             self.df = df
+            self._df_by_rid = df.set_index('row_id', drop=False)
             return df
         
-        # Create base dataframe with row IDs
-        df_data = {'row_id': range(1, max_len + 1)}
+        # Build the frame column by column. Each field is dictionary-encoded as soon as it
+        # is cleaned - repeated values (same IP, device, ...) become small integer codes,
+        # which are what _find_connections groups on
+        columns = {'row_id': np.arange(1, max_len + 1, dtype=np.int64)}
+        has_value = np.zeros(max_len, dtype=bool)
         
         # Add each field, padding shorter lists
         for field_name in self.all_fields:
             if field_name in field_data and field_data[field_name]:
-                data = field_data[field_name]
-                # Pad to max length
-                data = data + [''] * (max_len - len(data))
-                # Clean and normalize
-                df_data[field_name] = [str(v).strip().lower() if v else '' for v in data]
+                # Clean and normalize with vectorized string ops; reindex pads shorter
+                # fields with NA, which fillna turns into empty strings like missing values
+                column = pd.Series(field_data[field_name], dtype='string')
+                column = column.reindex(range(max_len)).str.strip().str.lower().fillna('')
+                has_value |= column.ne('').to_numpy()
+                columns[field_name] = column.astype('category')
             else:
                 # Field not provided, fill with empty strings
-                df_data[field_name] = [''] * max_len
+                columns[field_name] = pd.Series(pd.Categorical.from_codes(np.zeros(max_len, dtype=np.int8), [''], validate=False))
         
-        df = pd.DataFrame(df_data)
+        df = pd.DataFrame(columns, copy=False)
         
         # Remove rows where all feature fields are empty
-        df = df[df[self.all_fields].ne('').any(axis=1)]
+        df = df[has_value]
         df = df.reset_index(drop=True)
         
         self.df = df
+        self._df_by_rid = df.set_index('row_id', drop=False)
         return df
     
+    def _shared_value_groups(self, df: pd.DataFrame) -> List[Tuple[str, str, List[int]]]:
+        """Group row_ids by (feature, value), keeping only values shared by 2+ rows."""
+        features = [feature for feature in self.all_fields if feature in df.columns]
+        if not features or df.empty:
+            return []
+        
+        # Blank and placeholder values get code -1 and are skipped
+        categories = []
+        codes = []
+        for feature in features:
+            column = df[feature].cat
+            field_codes = column.codes.to_numpy().astype(np.int64)
+            placeholders = np.flatnonzero(column.categories.isin(self._BAD_VALUES))
+            field_codes[np.isin(field_codes, placeholders)] = -1
+            categories.append(column.categories.tolist())
+            codes.append(field_codes)
+        
+        # Fields are independent, so group them on worker threads (the NumPy sorts
+        # release the GIL)
+        row_ids = df['row_id'].to_numpy(dtype=np.int64)
+        with ThreadPoolExecutor(max_workers=min(len(features), os.cpu_count() or 1)) as executor:
+            indexed = list(executor.map(_index_field, codes, repeat(row_ids)))
+        
+        # Merge in the order a row-by-row scan would first see each value
+        group_codes = np.concatenate([field_groups[0] for field_groups in indexed])
+        group_fields = np.concatenate([np.full(len(field_groups[0]), i) for i, field_groups in enumerate(indexed)])
+        first_seen = np.concatenate([field_groups[1] for field_groups in indexed])
+        row_groups = [group for field_groups in indexed for group in field_groups[2]]
+        
+        order = np.lexsort((group_fields, first_seen))
+        
+        # Only resolve the strings for groups that actually connect rows
+        return [
+            (features[field], categories[field][code], row_groups[i].tolist())
+            for i, field, code in zip(order.tolist(), group_fields[order].tolist(), group_codes[order].tolist())
+        ]
+    
     def _find_connections(self, df: pd.DataFrame):
         """Find all connections between clients based on shared features."""
+        row_ids = df['row_id'].tolist()
+        rings = _UnionFind(max(row_ids, default=0) + 1)
+        self.ring_edges = []
+        self.large_group_rows = set()
+        
+        groups = self._shared_value_groups(df)
+        group_sizes = np.fromiter((len(client_ids) for _, _, client_ids in groups), dtype=np.int64, count=len(groups))
+        
+        for feature_type, feature_value, client_ids in groups:
+            # Join the group into one ring - K-1 unions rather than K^2 pairs; the unions
+            # that merge two rings make up a spanning forest of the graph
+            first = client_ids[0]
+            for other in client_ids[1:]:
+                if rings.union(first, other):
+                    self.ring_edges.append((first, other))
+            
+            if len(client_ids) > self.max_group_size:
+                self.large_group_rows.update(client_ids)
+        
+        # A value shared too widely (a proxy IP, a placeholder) would add K^2 edges - it is
+        # linked as a star instead and its edges are damped in the risk score
+        members = np.fromiter(
+            (client_id for _, _, client_ids in groups for client_id in client_ids),
+            dtype=np.int64, count=int(group_sizes.sum())
+        )
+        src, dst, group = _group_pairs(group_sizes, members, self.max_group_size)
+        group_weights = np.where(group_sizes > self.max_group_size, 1 / np.log(np.maximum(group_sizes, 2)), 1.0)
+        
+        # Find connections where 2+ clients share a feature - one per (low, high) row_id
+        # pair, in the order pairs are first seen
+        low, high = np.minimum(src, dst), np.maximum(src, dst)
+        pairs, first_seen, pair_of = np.unique((low << 32) | high, return_index=True, return_inverse=True)
+        rank = np.empty(len(pairs), dtype=np.int64)
+        rank[np.argsort(first_seen)] = np.arange(len(pairs))
+        pair_rank = rank[pair_of]
+        
+        weight = np.zeros(len(pairs))
+        np.maximum.at(weight, pair_rank, group_weights[group])
+        
+        # Shared features of each pair in the order they were found, without repeats
+        feature_names = list(dict.fromkeys(feature_type for feature_type, _, _ in groups))
+        feature_codes = {feature_type: i for i, feature_type in enumerate(feature_names)}
+        group_features = np.fromiter((feature_codes[g[0]] for g in groups), dtype=np.int64, count=len(groups))
+        num_features = max(len(feature_names), 1)
+        pair_features, feature_seen = np.unique(pair_rank * num_features + group_features[group], return_index=True)
+        feature_pair = pair_features // num_features
+        feature_order = np.lexsort((feature_seen, feature_pair))
+        shared = np.array(feature_names, dtype=object)[pair_features % num_features][feature_order].tolist()
+        shared_ends = np.cumsum(np.bincount(feature_pair, minlength=len(pairs))).tolist()
+        
+        firsts = np.sort(first_seen)
         connections = []
-        
-        # Build index for each feature
-        feature_index = defaultdict(list)
-        
-        for idx, row in df.iterrows():
-            for feature in self.all_fields:
-                if feature not in df.columns:
-                    continue
-                value = row[feature]
-                if value and value != '' and value not in ['nan', 'none', 'null']:
-                    feature_index[f"{feature}:{value}"].append(row['row_id'])
-        
-        # Find connections where 2+ clients share a feature
-        seen_pairs = set()
-        
-        for feature_key, client_ids in feature_index.items():
-            if len(client_ids) >= 2:
-                feature_type, feature_value = feature_key.split(':', 1)
-                
-                # Create edges between all pairs
-                for i, client1 in enumerate(client_ids):
-                    for client2 in client_ids[i+1:]:
-                        pair = tuple(sorted([client1, client2]))
-                        
-                        if pair not in seen_pairs:
-                            seen_pairs.add(pair)
-                            connections.append({
-                                'source': pair[0],
-                                'target': pair[1],
-                                'feature_type': feature_type,
-                                'feature_value': feature_value,
-                                'shared_features': [feature_type]
-                            })
-                        else:
-                            # Add to existing connection
-                            for conn in connections:
-                                if ((conn['source'] == pair[0] and conn['target'] == pair[1]) or
-                                    (conn['source'] == pair[1] and conn['target'] == pair[0])):
-                                    if feature_type not in conn['shared_features']:
-                                        conn['shared_features'].append(feature_type)
-                                    break
+        start = 0
+        for source, target, first_group, conn_weight, end in zip(
+            low[firsts].tolist(), high[firsts].tolist(), group[firsts].tolist(), weight.tolist(), shared_ends
+        ):
+            feature_type, feature_value, _ = groups[first_group]
+            connections.append({
+                'source': source,
+                'target': target,
+                'feature_type': feature_type,
+                'feature_value': feature_value,
+                'shared_features': shared[start:end],
+                'weight': conn_weight
+            })
+            start = end
         
         self.connections = connections
+        
+        # Ring (connected component) of every row, identified by its root row_id
+        self.communities = {row_id: rings.find(row_id) for row_id in row_ids}
     
     def _calculate_risk_scores(self):
         """Calculate fraud risk scores for each client."""
-        # Count connections per client
-        connection_count = defaultdict(int)
-        shared_features_count = defaultdict(list)
-        
-        for conn in self.connections:
-            connection_count[conn['source']] += 1
-            connection_count[conn['target']] += 1
-            shared_features_count[conn['source']].extend(conn['shared_features'])
-            shared_features_count[conn['target']].extend(conn['shared_features'])
-        
-        # Calculate risk scores
-        risk_scores = {}
-        
-        for client_id in self.df['client_id']:
-            # Base score on number of connections
-            num_connections = connection_count.get(client_id, 0)
-            
-            # Risk factors
-            connection_score = min(num_connections * 15, 60)  # Max 60 points from connections
-            
-            # Feature diversity score (sharing multiple types is riskier)
-            unique_features = len(set(shared_features_count.get(client_id, [])))
-            feature_diversity_score = min(unique_features * 10, 30)  # Max 30 points
-            
-            # Frequency score (if a client shares many features, higher risk)
-            feature_frequency = len(shared_features_count.get(client_id, []))
-            frequency_score = min(feature_frequency * 2, 10)  # Max 10 points
-            
-            total_score = connection_score + feature_diversity_score + frequency_score
-            risk_scores[client_id] = min(total_score, 100)
-        
-        self.risk_scores = risk_scores
+        conns = self.connections
+        size = int(self.df['row_id'].max()) + 1 if len(self.df) else 1
+        field_index = {field: i for i, field in enumerate(self.all_fields)}
+        
+        # Columnar copy of the connections (edge i is connection i). Shared features are
+        # flattened into (shared_edge, shared_field) pairs, one per feature of each edge
+        self.edge_src = np.fromiter((c['source'] for c in conns), dtype=np.int64, count=len(conns))
+        self.edge_dst = np.fromiter((c['target'] for c in conns), dtype=np.int64, count=len(conns))
+        weight = np.fromiter((c['weight'] for c in conns), dtype=np.float64, count=len(conns))
+        num_shared = np.fromiter((len(c['shared_features']) for c in conns), dtype=np.int64, count=len(conns))
+        self.edge_width = num_shared * 2
+        self.shared_edge = np.repeat(np.arange(len(conns)), num_shared)
+        self.shared_field = np.fromiter((field_index[f] for c in conns for f in c['shared_features']), dtype=np.int64)
+        
+        # The same features as one bitmask per edge (bit i = all_fields[i]); object dtype
+        # keeps arbitrary-size Python ints once there are too many fields for int64
+        mask_dtype = np.int64 if len(self.all_fields) < 63 else object
+        field_bits = np.array([1 << i for i in range(len(self.all_fields))], dtype=mask_dtype)
+        self.edge_feature_mask = np.zeros(len(conns), dtype=mask_dtype)
+        np.bitwise_or.at(self.edge_feature_mask, self.shared_edge, field_bits[self.shared_field])
+        
+        # Count connections per client - each edge counts for both of its ends
+        ends = np.concatenate([self.edge_src, self.edge_dst])
+        connection_count = np.bincount(ends, minlength=size)
+        connection_weight = np.bincount(ends, weights=np.tile(weight, 2), minlength=size)
+        feature_frequency = np.bincount(ends, weights=np.tile(num_shared, 2), minlength=size)
+        unique_features = self._feature_type_counts(size)
+        
+        # Risk factors (star edges from large groups count less towards connections)
+        connection_score = np.minimum(connection_weight * 15, 60)  # Max 60 points from connections
+        feature_diversity_score = np.minimum(unique_features * 10, 30)  # Max 30 points - sharing multiple types is riskier
+        frequency_score = np.minimum(feature_frequency * 2, 10)  # Max 10 points - many shared features
+        
+        total_score = connection_score + feature_diversity_score + frequency_score
+        
+        # Both arrays are indexed by row_id
+        self.risk_scores = np.rint(np.minimum(total_score, 100)).astype(np.int64)
         self.connection_count = connection_count
+        self.feature_type_count = unique_features
+    
+    def _feature_type_counts(self, size: int, edge_mask=None) -> np.ndarray:
+        """Count the distinct feature types connecting each row_id, optionally over a subset of edges."""
+        masks = self.edge_feature_mask
+        if edge_mask is not None:
+            masks = np.where(edge_mask, masks, 0).astype(masks.dtype)
+        
+        # OR together the feature bits of every edge touching a client, then count bits
+        client_masks = np.zeros(size, dtype=masks.dtype)
+        np.bitwise_or.at(client_masks, self.edge_src, masks)
+        np.bitwise_or.at(client_masks, self.edge_dst, masks)
+        return _popcount(client_masks)
     
     def _build_graph_data(self) -> Dict[str, Any]:
         """Build the final graph structure for Vis.js."""
-        # First, calculate the number of unique feature types each node is connected by
-        node_feature_types = {}
-        for conn in self.connections:
-            source = conn['source']
-            target = conn['target']
-            features = set(conn['shared_features'])
-            
-            if source not in node_feature_types:
-                node_feature_types[source] = set()
-            if target not in node_feature_types:
-                node_feature_types[target] = set()
-            
-            node_feature_types[source].update(features)
-            node_feature_types[target].update(features)
+        df = self.df
+        row_ids = df['row_id'].to_numpy(dtype=np.int64)
+        risk_scores = self.risk_scores[row_ids]
+        num_connections = self.connection_count[row_ids]
+        
+        # Color by the number of unique feature TYPES each node is connected by
+        num_feature_types = self.feature_type_count[row_ids]
+        tier = np.minimum(num_feature_types, 3)
+        colors = np.take(self._COLOR_LUT, tier)
+        risk_levels = np.take(self._LEVEL_LUT, tier)
+        
+        # Build label - use first field's value as the entity name (max 30 chars),
+        # falling back to the row id
+        fields = [field for field in self.all_fields if field in df.columns]
+        values = {field: df[field].astype('string') for field in fields}
+        fallback = 'Row ' + pd.Series(row_ids, index=df.index).astype('string')
+        if self.all_fields and self.all_fields[0] in values:
+            first = values[self.all_fields[0]]
+            labels = first.str.slice(0, 30).where(first.ne(''), fallback)
+        else:
+            labels = fallback
+        
+        # Build tooltips column by column rather than one f-string per row
+        large_group = np.isin(row_ids, list(self.large_group_rows))
+        warning = pd.Series(
+            np.where(large_group, f"Shares a value with more than {self.max_group_size} rows<br>", ''),
+            index=df.index, dtype='string'
+        )
+        header = ('<b>' + labels + '</b><br>'
+                  + 'Risk Score: ' + pd.Series(risk_scores, index=df.index).astype('string')
+                  + ' (' + pd.Series(risk_levels, index=df.index, dtype='string') + ')<br>'
+                  + 'Connections: ' + pd.Series(num_connections, index=df.index).astype('string') + '<br>'
+                  + warning + '<hr>')
+        
+        # Add all field values to tooltip with custom display names
+        blocks = []
+        for field_name in self.all_fields:
+            if field_name in values:
+                # Use custom display name if available
+                if self.field_display_names and field_name in self.field_display_names:
+                    display_name = self.field_display_names[field_name]
+                else:
+                    display_name = field_name.replace('_', ' ').title()
+                value = values[field_name]
+                blocks.append((f"<b>{display_name}:</b> " + value + '<br>').where(value.ne(''), ''))
+        titles = header.str.cat(blocks, sep='') if blocks else header
         
-        nodes = []
+        self.node_ids = row_ids
+        self.node_risk = risk_scores
         
-        for _, row in self.df.iterrows():
-            row_id = row['row_id']
-            risk_score = self.risk_scores.get(row_id, 0)
-            num_connections = self.connection_count.get(row_id, 0)
-            
-            # Determine color based on number of TYPES of connections (feature types)
-            # Apple-inspired soft, elegant node colors
-            num_feature_types = len(node_feature_types.get(row_id, set()))
-            
-            if num_feature_types == 1:
-                color = '#B4E4FF'  # Soft Blue - 1 feature type (Apple light blue)
-                risk_level = 'Low'
-            elif num_feature_types == 2:
-                color = '#88C9FF'  # Medium Blue - 2 feature types (Apple blue)
-                risk_level = 'Medium'
-            else:  # 3+ feature types
-                color = '#007AFF'  # Apple Blue - 3+ feature types (signature Apple blue)
-                risk_level = 'High'
-            
-            # Build label - use first field's value as the entity name
-            label = f"Row {row_id}"  # Default fallback
-            if self.all_fields and len(self.all_fields) > 0:
-                first_field = self.all_fields[0]
-                if first_field in row and row[first_field]:
-                    label = str(row[first_field])[:30]  # Use first field value, max 30 chars
-            
-            # Build tooltip with all fields
-            title = f"<b>{label}</b><br>"
-            title += f"Risk Score: {risk_score:.0f} ({risk_level})<br>"
-            title += f"Connections: {num_connections}<br>"
-            title += "<hr>"
-            
-            # Add all field values to tooltip with custom display names
-            for field_name in self.all_fields:
-                if field_name in row and row[field_name]:
-                    # Use custom display name if available
-                    if self.field_display_names and field_name in self.field_display_names:
-                        display_name = self.field_display_names[field_name]
-                    else:
-                        display_name = field_name.replace('_', ' ').title()
-                    title += f"<b>{display_name}:</b> {row[field_name]}<br>"
-            
-            nodes.append({
-                'id': int(row_id),
+        nodes = [
+            {
+                'id': row_id,
                 'label': label,
                 'title': title,
                 'color': color,
                 'size': 24,  # Fixed size for all nodes
                 'risk_score': risk_score,
-                'connections': num_connections,
-                'feature_types': num_feature_types,
-                'risk_level': risk_level
-            })
+                'connections': connections,
+                'feature_types': feature_types,
+                'risk_level': risk_level,
+                'large_group': large
+            }
+            for row_id, label, title, color, risk_score, connections, feature_types, risk_level, large in zip(
+                row_ids.tolist(), labels.tolist(), titles.tolist(), colors.tolist(), risk_scores.tolist(),
+                num_connections.tolist(), num_feature_types.tolist(), risk_levels.tolist(), large_group.tolist()
+            )
+        ]
         
         # Build edges with color based on field type
         edges = []
@@ -369,40 +600,38 @@ class FraudRingDetector:
     
     def get_high_risk_clients(self, threshold: int = 50) -> pd.DataFrame:
         """Get a DataFrame of high-risk clients."""
-        high_risk = []
-        
-        for node in self.nodes:
-            if node['risk_score'] >= threshold:
-                client_data = self.df[self.df['row_id'] == node['id']].iloc[0]
-                row_dict = {
-                    'Row ID': node['id'],
-                    'Risk Score': node['risk_score'],
-                    'Risk Level': node['risk_level'],
-                    'Connections': node['connections'],
-                }
-                
-                # Add all field values
-                for field_name in self.all_fields:
-                    display_name = field_name.replace('_', ' ').title()
-                    row_dict[display_name] = client_data.get(field_name, '')
-                
-                high_risk.append(row_dict)
+        # Select with the columnar arrays and look rows up on the row_id index in one go
+        positions = np.flatnonzero(self.node_risk >= threshold)
+        if not len(positions):
+            return pd.DataFrame()
+        
+        row_ids = self.node_ids[positions]
+        client_data = self._df_by_rid.loc[row_ids]
+        high_risk = {
+            'Row ID': row_ids.tolist(),
+            'Risk Score': self.node_risk[positions].tolist(),
+            'Risk Level': [self.nodes[i]['risk_level'] for i in positions.tolist()],
+            'Connections': self.connection_count[row_ids].tolist(),
+        }
         
-        return pd.DataFrame(high_risk).sort_values('Risk Score', ascending=False) if high_risk else pd.DataFrame()
+        # Add all field values
+        for field_name in self.all_fields:
+            display_name = field_name.replace('_', ' ').title()
+            high_risk[display_name] = client_data[field_name].tolist() if field_name in client_data else [''] * len(row_ids)
+        
+        return pd.DataFrame(high_risk).sort_values('Risk Score', ascending=False)
     
     def get_connection_details(self) -> pd.DataFrame:
         """Get a DataFrame of all connections."""
-        details = []
-        
-        for edge in self.edges:
-            details.append({
-                'Client 1': edge['from'],
-                'Client 2': edge['to'],
-                'Shared Features': ', '.join(edge['shared_features']),
-                'Feature Count': len(edge['shared_features'])
-            })
-        
-        return pd.DataFrame(details)
+        if not self.edges:
+            return pd.DataFrame()
+        
+        return pd.DataFrame({
+            'Client 1': self.edge_src,
+            'Client 2': self.edge_dst,
+            'Shared Features': [', '.join(edge['shared_features']) for edge in self.edges],
+            'Feature Count': self.edge_width // 2
+        })
     
     def filter_graph(self, min_risk: int = 0, feature_types: List[str] = None) -> Dict[str, Any]:
         """
@@ -415,75 +644,120 @@ class FraudRingDetector:
         Returns:
             Filtered graph data with recalculated node colors
         """
+        # Results only depend on the arguments until the next process_data call
+        cache_key = (min_risk, frozenset(feature_types or ()))
+        if cache_key in self._filter_cache:
+            return self._filter_cache[cache_key]
+        
         # Filter nodes by risk
-        filtered_nodes = [n.copy() for n in self.nodes if n['risk_score'] >= min_risk]
-        filtered_node_ids = {n['id'] for n in filtered_nodes}
+        node_mask = self.node_risk >= min_risk
+        in_view = np.zeros(int(self.node_ids.max()) + 1 if len(self.node_ids) else 1, dtype=bool)
+        in_view[self.node_ids[node_mask]] = True
         
-        # Filter edges by feature types and node presence
-        filtered_edges = []
+        # Filter edges by node presence and feature types
+        edge_mask = in_view[self.edge_src] & in_view[self.edge_dst]
         if feature_types:
-            for edge in self.edges:
-                # Check if edge connects filtered nodes
-                if edge['from'] in filtered_node_ids and edge['to'] in filtered_node_ids:
-                    # Check if edge has any of the selected feature types
-                    if any(ft in edge['shared_features'] for ft in feature_types):
-                        filtered_edges.append(edge)
-        else:
-            # No feature filter, just use node filter
-            filtered_edges = [e for e in self.edges 
-                            if e['from'] in filtered_node_ids and e['to'] in filtered_node_ids]
+            # Keep edges with any of the selected feature types - one AND per edge
+            query = sum(1 << i for i, field in enumerate(self.all_fields) if field in feature_types)
+            edge_mask &= (self.edge_feature_mask & query) != 0
+        
+        filtered_edges = [self.edges[i] for i in np.flatnonzero(edge_mask).tolist()]
         
         # Recalculate feature types based on filtered edges
-        node_feature_types = {}
-        for edge in filtered_edges:
-            source = edge['from']
-            target = edge['to']
-            features = set(edge['shared_features'])
-            
-            if source not in node_feature_types:
-                node_feature_types[source] = set()
-            if target not in node_feature_types:
-                node_feature_types[target] = set()
-            
-            node_feature_types[source].update(features)
-            node_feature_types[target].update(features)
+        feature_type_counts = self._feature_type_counts(len(in_view), edge_mask)[self.node_ids[node_mask]]
+        tier = np.minimum(feature_type_counts, 3)
+        colors = np.take(self._COLOR_LUT, tier)
+        risk_levels = np.take(self._LEVEL_LUT, tier)
         
         # Update node colors based on filtered feature types
-        for node in filtered_nodes:
-            num_feature_types = len(node_feature_types.get(node['id'], set()))
-            
-            # ALWAYS update the feature_types to reflect filtered state
-            node['feature_types'] = num_feature_types
-            
-            # Update color based on filtered feature types (Apple-inspired soft colors)
-            if num_feature_types == 0:
-                # No connections in filtered view - make it very light gray
-                node['color'] = '#E5E5EA'  # Apple System Gray 5
-                node['risk_level'] = 'None'
-            elif num_feature_types == 1:
-                node['color'] = '#B4E4FF'  # Soft Blue (Apple light blue)
-                node['risk_level'] = 'Low'
-            elif num_feature_types == 2:
-                node['color'] = '#88C9FF'  # Medium Blue (Apple blue)
-                node['risk_level'] = 'Medium'
-            else:  # 3+
-                node['color'] = '#007AFF'  # Apple Blue (signature)
-                node['risk_level'] = 'High'
-        
-        return {
+        filtered_nodes = [
+            {**self.nodes[i], 'feature_types': num_feature_types, 'color': color, 'risk_level': risk_level}
+            for i, num_feature_types, color, risk_level in zip(
+                np.flatnonzero(node_mask).tolist(), feature_type_counts.tolist(),
+                colors.tolist(), risk_levels.tolist()
+            )
+        ]
+        
+        result = {
             'nodes': filtered_nodes,
             'edges': filtered_edges
         }
+        self._filter_cache[cache_key] = result
+        return result
     
-    def export_to_json(self) -> str:
-        """Export graph data to JSON string."""
-        return json.dumps({
+    def export_to_json(self, pretty: bool = False) -> str:
+        """
+        Export graph data to JSON string.
+        
+        Args:
+            pretty: Indent the output for reading; compact by default
+        """
+        data = {
             'nodes': self.nodes,
             'edges': self.edges,
             'metadata': {
                 'total_clients': len(self.nodes),
                 'total_connections': len(self.edges),
-                'high_risk_count': len([n for n in self.nodes if n['risk_score'] >= 80])
+                'high_risk_count': int(np.count_nonzero(self.node_risk >= 80))
             }
-        }, indent=2)
-
+        }
+        
+        if orjson is not None:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+        if pretty:
+            return json.dumps(data, indent=2)
+        return json.dumps(data, separators=(',', ':'))
+    
+    def to_arrow(self) -> Dict[str, Any]:
+        """
+        Export nodes and edges as Arrow tables for columnar consumers.
+        
+        Built from the detector's arrays rather than the node/edge dicts, so pandas,
+        DuckDB or cudf can take the buffers without re-parsing. Colors, risk levels
+        and feature names are dictionary-encoded.
+        
+        Returns:
+            Dictionary with 'nodes' and 'edges' pyarrow Tables
+        """
+        if pa is None:
+            raise ImportError("to_arrow() requires pyarrow (pip install pyarrow)")
+        
+        tier = np.minimum(self.feature_type_count[self.node_ids], 3).astype(np.int8)
+        nodes = pa.table({
+            'id': self.node_ids,
+            'label': [node['label'] for node in self.nodes],
+            'risk_score': self.node_risk,
+            'connections': self.connection_count[self.node_ids],
+            'feature_types': self.feature_type_count[self.node_ids],
+            'risk_level': pa.DictionaryArray.from_arrays(tier, list(self._LEVEL_LUT)),
+            'color': pa.DictionaryArray.from_arrays(tier, list(self._COLOR_LUT)),
+            'large_group': np.isin(self.node_ids, list(self.large_group_rows)),
+        })
+        
+        # shared_features as list<dictionary<string>> over the (shared_edge, shared_field) pairs
+        offsets = np.r_[0, np.cumsum(self.edge_width // 2)].astype(np.int32)
+        shared_features = pa.ListArray.from_arrays(
+            offsets, pa.DictionaryArray.from_arrays(self.shared_field.astype(np.int32), list(self.all_fields))
+        )
+        edges = pa.table({
+            'id': np.arange(len(self.edges)),
+            'from': self.edge_src,
+            'to': self.edge_dst,
+            'width': self.edge_width,
+            'color': pa.array([edge['color'] for edge in self.edges], type=pa.string()).dictionary_encode(),
+            'shared_features': shared_features,
+        })
+        
+        return {
+            'nodes': nodes,
+            'edges': edges
+        }
+    
+    def to_cudf(self) -> Dict[str, Any]:
+        """Export nodes and edges as cudf DataFrames (GPU), via to_arrow()."""
+        try:
+            import cudf
+        except ImportError as e:
+            raise ImportError("to_cudf() requires cudf (RAPIDS)") from e
+        
+        return {name: cudf.DataFrame.from_arrow(table) for name, table in self.to_arrow().items()}
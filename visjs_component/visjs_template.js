@@ -0,0 +1,449 @@
+// Page script for the network built by visjs_template.get_visjs_html().
+// Expects the page to define `graph` (the get_visjs_graph() payload) before loading it.
+
+var nodes = new vis.DataSet(nodeRecords(graph.nodes));
+var edges = new vis.DataSet();  // Filled in batches once the page is up (see loadEdges)
+var EDGE_CHUNK_SIZE = 5000;
+var edgeChunkTimer = null;  // Pending step of loadEdges(), including its completion callback
+
+// Edges are filtered by weight in the browser (changing the threshold needs no new data)
+var minEdgeWeight = graph.min_edge_weight;
+var edgeView = new vis.DataView(edges, {
+    filter: function(edge) {
+        return (edge.shared_features || []).length >= minEdgeWeight;
+    }
+});
+
+// The page's weight slider moves the same threshold
+var weightSlider = document.getElementById('min-weight');
+function syncWeightSlider(maxWeight) {
+    weightSlider.max = Math.max(maxWeight, minEdgeWeight, 1);
+    weightSlider.value = minEdgeWeight;
+    document.getElementById('min-weight-value').innerText = minEdgeWeight;
+}
+syncWeightSlider(graph.max_edge_weight);
+
+function setMinEdgeWeight(value) {
+    minEdgeWeight = parseInt(value, 10);
+    document.getElementById('min-weight-value').innerText = minEdgeWeight;
+    edgeView.refresh();
+    updateStats();
+}
+
+// Create a network
+var container = document.getElementById('mynetwork');
+var data = {
+    nodes: nodes,
+    edges: edgeView
+};
+
+var options = graph.options;
+
+// Physics starts off so the network paints right away; the layout is
+// stabilized once the page is up (see startLayout)
+var network = new vis.Network(container, data, Object.assign({}, options, {
+    physics: Object.assign({}, options.physics, { enabled: false })
+}));
+var physicsEnabled = false;
+var keepPhysics = graph.keep_physics;  // Keep physics running after stabilization
+var layoutStarted = false;
+var layoutKey = graph.layout_key;  // Changes when the graph needs a new layout (see get_visjs_graph)
+var structureKey = graph.structure_key;  // Changes with the node ids or edge endpoints
+var selectedNodes = [];
+var highlightActive = false;
+var highlightRoles = new Map();  // Node id -> 'selected' / 'neighbor' while highlighted; the rest are faded
+var nodeColors = null;  // Original node colors, captured when a highlight starts
+
+// Update stats
+function updateStats() {
+    document.getElementById('node-count').innerText = nodes.length;
+    document.getElementById('edge-count').innerText = edgeView.length;
+}
+updateStats();
+
+// Lay out from scratch; stabilizationIterationsDone freezes physics if needed.
+// Large graphs arrive with positions and physics off (get_visjs_graph) - nothing to do.
+function startLayout(graphOptions) {
+    layoutStarted = true;
+    if (!graphOptions.physics.enabled) {
+        return;
+    }
+    physicsEnabled = true;
+    network.setOptions({ physics: { enabled: true } });
+    network.stabilize(graphOptions.physics.stabilization.iterations);
+}
+
+// Rebuild node objects from the column-wise payload ({count, columns: {key: [values]}});
+// null marks a key the node doesn't have
+function nodeRecords(payload) {
+    var keys = Object.keys(payload.columns);
+    var records = new Array(payload.count);
+    for (var i = 0; i < payload.count; i++) {
+        var record = {};
+        for (var k = 0; k < keys.length; k++) {
+            var value = payload.columns[keys[k]][i];
+            if (value !== null) {
+                record[keys[k]] = value;
+            }
+        }
+        records[i] = record;
+    }
+    return records;
+}
+
+// Replace the items of a DataSet in place (existing nodes keep their positions)
+function syncDataSet(dataSet, items) {
+    var keep = new Set(items.map(function(item) { return item.id; }));
+    dataSet.remove(dataSet.getIds().filter(function(id) { return !keep.has(id); }));
+    dataSet.update(items);
+}
+
+// Replace the edges a batch at a time, yielding to the browser in between, so the
+// page paints and responds before a large edge set is fully indexed. Edges missing
+// from `items` are removed up front; `done` runs shortly after the last batch.
+// A new call cancels a load still in progress (and its callback).
+function loadEdges(items, done) {
+    if (edgeChunkTimer !== null) {
+        clearTimeout(edgeChunkTimer);
+    }
+    var keep = new Set(items.map(function(item) { return item.id; }));
+    edges.remove(edges.getIds().filter(function(id) { return !keep.has(id); }));
+    updateStats();
+
+    function loadChunk(start) {
+        edges.update(items.slice(start, start + EDGE_CHUNK_SIZE));
+        updateStats();
+        if (start + EDGE_CHUNK_SIZE < items.length) {
+            edgeChunkTimer = setTimeout(function() { loadChunk(start + EDGE_CHUNK_SIZE); }, 0);
+        } else {
+            edgeChunkTimer = setTimeout(function() {
+                edgeChunkTimer = null;
+                done();
+            }, 100);
+        }
+    }
+    edgeChunkTimer = setTimeout(function() { loadChunk(0); }, 0);
+}
+
+// Apply a new graph payload (see get_visjs_graph) without re-creating the network,
+// so the viewport and layout survive settings changes. Called by the Streamlit component.
+window.updateGraph = function(newGraph) {
+    var firstLoad = !layoutStarted;
+    // New data or physics settings: stabilize again, since solver settings
+    // only take effect while stabilizing
+    var relayout = firstLoad || newGraph.layout_key !== layoutKey;
+    layoutKey = newGraph.layout_key;
+    var sameStructure = newGraph.structure_key === structureKey;
+    structureKey = newGraph.structure_key;
+    resetSelection();
+    window.originalEdgeColors = null;
+    keepPhysics = newGraph.keep_physics;
+    // Physics stays off while the data is swapped, so the new graph paints first
+    physicsEnabled = false;
+    network.setOptions(Object.assign({}, newGraph.options, {
+        physics: Object.assign({}, newGraph.options.physics, { enabled: false })
+    }));
+    var records = nodeRecords(newGraph.nodes);
+    if (!firstLoad && sameStructure) {
+        // Precomputed positions only apply to a new graph (node ids are row numbers,
+        // so the structure is compared, not the ids); otherwise every node stays
+        // where it is, including any the user dragged
+        records.forEach(function(record) {
+            delete record.x;
+            delete record.y;
+        });
+    }
+    syncDataSet(nodes, records);
+    minEdgeWeight = newGraph.min_edge_weight;
+    syncWeightSlider(newGraph.max_edge_weight);
+    edgeView.refresh();
+
+    // Replaces any load still in progress, including the page's own initial one
+    loadEdges(newGraph.edges, function() {
+        if (relayout) {
+            fitNetwork();
+            startLayout(newGraph.options);
+        } else {
+            // Keep the current layout
+            physicsEnabled = keepPhysics;
+            network.setOptions({ physics: { enabled: physicsEnabled } });
+        }
+    });
+};
+
+// Stabilization progress
+network.on("stabilizationProgress", function(params) {
+    var maxWidth = 200;
+    var widthFactor = params.iterations/params.total;
+    console.log("Stabilizing: " + Math.round(widthFactor * 100) + "%");
+});
+
+// When stabilized, freeze the layout unless live physics was requested
+network.on("stabilizationIterationsDone", function() {
+    if (!keepPhysics) {
+        physicsEnabled = false;
+        network.setOptions({ physics: { enabled: false } });
+    }
+    console.log("Stabilization complete! Physics " + (physicsEnabled ? "remains enabled." : "disabled."));
+});
+
+// Node click event - highlight connections
+network.on("click", function(params) {
+    if (edgeChunkTimer !== null) {
+        // Edges still loading: a highlight would only capture (and fade) part of them
+        return;
+    }
+    if (params.nodes.length > 0) {
+        var selectedNodeId = params.nodes[0];
+        highlightConnections(selectedNodeId);
+        document.getElementById('selected-node').innerText = 'Node ' + selectedNodeId;
+    } else {
+        resetSelection();
+    }
+});
+
+// Hover effects - hover/blur events come in bursts while the mouse moves, so the
+// cursor is written at most once per frame (and only when it changes)
+var pendingCursor = null;
+function setCursor(cursor) {
+    if (pendingCursor === null) {
+        requestAnimationFrame(function() {
+            if (container.style.cursor !== pendingCursor) {
+                container.style.cursor = pendingCursor;
+            }
+            pendingCursor = null;
+        });
+    }
+    pendingCursor = cursor;
+}
+
+network.on("hoverNode", function(params) {
+    setCursor('pointer');
+});
+
+network.on("blurNode", function(params) {
+    setCursor('default');
+});
+
+network.on("hoverEdge", function(params) {
+    setCursor('pointer');
+});
+
+network.on("blurEdge", function(params) {
+    setCursor('default');
+});
+
+// Double click to zoom to node
+network.on("doubleClick", function(params) {
+    if (params.nodes.length > 0) {
+        network.focus(params.nodes[0], {
+            scale: 1.5,
+            animation: {
+                duration: 1000,
+                easingFunction: 'easeInOutQuad'
+            }
+        });
+    }
+});
+
+// Highlight connections function
+// Node update for a highlight role ('selected', 'neighbor', 'faded' or 'normal')
+function nodeStyle(id, role) {
+    if (role === 'selected') {
+        return {id: id, borderWidth: 6, font: {size: 16, bold: true}, color: nodeColors.get(id)};
+    } else if (role === 'neighbor') {
+        return {id: id, borderWidth: 4, font: {size: 14}, color: nodeColors.get(id)};
+    } else if (role === 'faded') {
+        return {id: id, borderWidth: 1, font: {size: 12, color: '#cccccc'},
+                color: {background: nodeColors.get(id), border: '#cccccc'}};
+    }
+    return {id: id, borderWidth: 2, font: {size: 14, color: '#000000'}, color: nodeColors.get(id)};
+}
+
+function highlightConnections(nodeId) {
+    // Get all connected edges (as a Set for constant-time membership tests below)
+    var connectedEdges = new Set(network.getConnectedEdges(nodeId));
+    var connectedNodes = network.getConnectedNodes(nodeId);
+
+    var roles = new Map();
+    connectedNodes.forEach(function(id) { roles.set(id, 'neighbor'); });
+    roles.set(nodeId, 'selected');
+
+    // Update nodes: a new highlight fades every other node; moving the highlight only
+    // restyles the nodes whose role changes
+    var nodeUpdates = [];
+    if (!highlightActive) {
+        nodeColors = new Map();
+        nodes.forEach(function(node) {
+            nodeColors.set(node.id, node.color);
+            nodeUpdates.push(nodeStyle(node.id, roles.get(node.id) || 'faded'));
+        });
+    } else {
+        highlightRoles.forEach(function(role, id) {
+            if (!roles.has(id)) {
+                nodeUpdates.push(nodeStyle(id, 'faded'));
+            }
+        });
+        roles.forEach(function(role, id) {
+            if (highlightRoles.get(id) !== role) {
+                nodeUpdates.push(nodeStyle(id, role));
+            }
+        });
+    }
+    highlightActive = true;
+    highlightRoles = roles;
+
+    // Store original edge colors if not already stored
+    var allEdges = edges.get();
+    if (!window.originalEdgeColors) {
+        window.originalEdgeColors = new Map();
+        allEdges.forEach(function(edge) {
+            window.originalEdgeColors.set(edge.id, edge.color || '#848484');
+        });
+    }
+
+    // Update all edges
+    allEdges.forEach(function(edge) {
+        if (connectedEdges.has(edge.id)) {
+            // Connected edges - highlight with original color but brighter
+            edge.width = edge.width * 2;
+            // Keep original color but make it stand out
+            var origColor = window.originalEdgeColors.get(edge.id) || '#848484';
+            edge.color = {color: origColor, opacity: 1};
+        } else {
+            // Other edges - fade
+            edge.color = {color: '#cccccc', opacity: 0.2};
+        }
+    });
+
+    nodes.update(nodeUpdates);
+    edges.update(allEdges);
+}
+
+// Reset selection
+function resetSelection() {
+    if (!highlightActive) return;
+
+    highlightActive = false;
+    document.getElementById('selected-node').innerText = 'None';
+
+    // Reset all nodes
+    var nodeUpdates = [];
+    nodeColors.forEach(function(color, id) {
+        nodeUpdates.push(nodeStyle(id, 'normal'));
+    });
+    highlightRoles = new Map();
+
+    // Reset all edges to original colors
+    var allEdges = edges.get();
+    allEdges.forEach(function(edge) {
+        // Restore original color
+        edge.color = window.originalEdgeColors.get(edge.id) || '#848484';
+        // Reset width if it was modified
+        if (edge.width > 10) {
+            edge.width = edge.width / 2;
+        }
+    });
+
+    nodes.update(nodeUpdates);
+    edges.update(allEdges);
+}
+
+// Control functions
+function fitNetwork() {
+    network.fit({
+        animation: {
+            duration: 1000,
+            easingFunction: 'easeInOutQuad'
+        }
+    });
+}
+
+function togglePhysics() {
+    physicsEnabled = !physicsEnabled;
+    network.setOptions({ physics: physicsEnabled });
+    console.log("Physics: " + (physicsEnabled ? "ON" : "OFF"));
+}
+
+// Export function (can be called from parent)
+function exportNetwork() {
+    return {
+        nodes: nodes.get(),
+        edges: edgeView.get()
+    };
+}
+
+// Panels with a backdrop blur, which html2canvas can only emulate very slowly
+var BLURRED_PANELS = '#legend, #stats, #controls, #export-controls';
+
+function setPanelBlur(enabled) {
+    document.querySelectorAll(BLURRED_PANELS).forEach(function(panel) {
+        // '' falls back to the stylesheet's blur
+        panel.style.backdropFilter = enabled ? '' : 'none';
+        panel.style.webkitBackdropFilter = enabled ? '' : 'none';
+    });
+}
+
+// Export PNG function - captures entire visualization as you see it
+function exportPNG() {
+    try {
+        // Hide export button temporarily
+        const exportControls = document.getElementById('export-controls');
+        exportControls.style.display = 'none';
+        setPanelBlur(false);
+
+        // Use html2canvas to capture the entire visualization wrapper as user sees it
+        const visualizationWrapper = document.getElementById('visualization-wrapper');
+
+        // Capture at the screen's pixel density (capped at 2x)
+        const scale = Math.min(2, window.devicePixelRatio || 1);
+
+        html2canvas(visualizationWrapper, {
+            backgroundColor: '#fafafa',
+            scale: scale,
+            logging: false,
+            useCORS: true,
+            allowTaint: true
+        }).then(function(canvas) {
+            setPanelBlur(true);
+
+            // Add timestamp
+            const ctx = canvas.getContext('2d');
+            const now = new Date();
+            const timestamp = now.toISOString().replace('T', ' ').substring(0, 19);
+
+            ctx.fillStyle = '#666666';
+            ctx.font = (12 * scale) + 'px Arial, sans-serif';
+            ctx.textAlign = 'right';
+            ctx.fillText('Generated: ' + timestamp, canvas.width - 10 * scale, canvas.height - 10 * scale);
+
+            // Download
+            const link = document.createElement('a');
+            const fileTimestamp = now.toISOString().replace(/[:.]/g, '-').slice(0, -5);
+            link.download = 'fraud-network-' + fileTimestamp + '.png';
+            link.href = canvas.toDataURL('image/png');
+            link.click();
+
+            // Restore export button
+            exportControls.style.display = 'block';
+        }).catch(function(error) {
+            setPanelBlur(true);
+            console.error('Export error:', error);
+            alert('Export failed: ' + error.message);
+            exportControls.style.display = 'block';
+        });
+
+    } catch (e) {
+        setPanelBlur(true);
+        console.error('Export setup error:', e);
+        alert('Export failed: ' + e.message);
+    }
+}
+
+// Load the page's own edges, then fit and start the layout now that the graph is complete
+loadEdges(graph.edges, function() {
+    fitNetwork();
+    if (!layoutStarted && nodes.length > 0) {
+        startLayout(options);
+    }
+});
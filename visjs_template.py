@@ -2,285 +2,477 @@
 Vis.js Visualization Template
 Generates HTML/JavaScript for interactive network visualization
 """
+import hashlib
+import json
+import math
+import string
+import threading
+from collections import OrderedDict
+from pathlib import Path
 
+import numpy as np
 
-def get_visjs_html(nodes, edges, height=700, physics_enabled=True, field_colors=None, chart_title="Fraud Ring Network", 
-                   layout_algorithm="forceAtlas2Based", edge_smooth_type="continuous", edge_opacity=1.0, 
-                   min_edge_weight=1, show_edge_labels=True, use_hierarchical=False):
+try:
+    import orjson
+except ImportError:  # Optional - much faster on large graphs, stdlib json otherwise
+    orjson = None
+
+# Static page CSS/JS; also served to the Streamlit component from visjs_component/
+_ASSET_DIR = Path(__file__).with_name('visjs_component')
+_PAGE_CSS = (_ASSET_DIR / 'visjs_template.css').read_text(encoding='utf-8')
+_PAGE_JS = (_ASSET_DIR / 'visjs_template.js').read_text(encoding='utf-8')
+
+# Recent get_visjs_html() pages, keyed on a digest of their inputs (least recently used first)
+_HTML_CACHE = OrderedDict()
+_HTML_CACHE_SIZE = 8
+_HTML_CACHE_LOCK = threading.Lock()
+
+# Recent get_visjs_graph() payloads, keyed the same way
+_GRAPH_CACHE = OrderedDict()
+_GRAPH_CACHE_SIZE = 8
+_GRAPH_CACHE_LOCK = threading.Lock()
+
+# Graphs with more nodes are laid out server-side (see get_visjs_graph's precomputed_layout)
+PRECOMPUTED_LAYOUT_MIN_NODES = 500
+
+# Recent server-side layouts, keyed on a digest of the node ids and edge endpoints
+_LAYOUT_CACHE = OrderedDict()
+_LAYOUT_CACHE_SIZE = 8
+_LAYOUT_CACHE_LOCK = threading.Lock()
+
+# Graphs with more edges/nodes skip drawing them while the view is dragged or zoomed
+HIDE_EDGES_MIN_EDGES = 2000
+HIDE_NODES_MIN_NODES = 5000
+
+# Server-side layout: approximate distance between neighbouring nodes (canvas pixels),
+# and the largest component placed on a plain circle instead of a spring layout
+_LAYOUT_NODE_SPACING = 120
+_LAYOUT_CIRCLE_MAX_NODES = 8
+
+
+def get_visjs_graph(nodes, edges, physics_enabled=True, layout_algorithm="forceAtlas2Based",
+                    edge_smooth_type="continuous", edge_opacity=1.0, min_edge_weight=1,
+                    show_edge_labels=True, use_hierarchical=False, stabilization_iterations=800,
+                    solver_theta=0.5, precomputed_layout=True):
     """
-    Generate HTML template with Vis.js network visualization.
+    Build the Vis.js graph payload: display-ready nodes/edges plus network options.
     
-    Args:
-        nodes: List of node dictionaries
-        edges: List of edge dictionaries
-        height: Height of the visualization in pixels
-        physics_enabled: Whether to enable physics simulation
-        field_colors: Optional dict mapping field names to colors for legend
-        chart_title: Title displayed at top of chart
-        layout_algorithm: Physics layout algorithm (barnesHut, forceAtlas2Based, repulsion, hierarchicalRepulsion)
-        edge_smooth_type: Edge smoothing type (dynamic, continuous, discrete, diagonalCross, straightCross, horizontal, vertical, curvedCW, curvedCCW, cubicBezier)
-        edge_opacity: Edge opacity (0.0-1.0)
-        min_edge_weight: Minimum edge weight to display (filters edges)
-        show_edge_labels: Whether to show edge labels
+    The payload is JSON-serializable, so it can be embedded in the page by
+    get_visjs_html() or passed to the page's updateGraph() to update an existing
+    network in place. Arguments are the same as for get_visjs_html().
+    
+    All edges are included; the page filters them by min_edge_weight in the
+    browser (vis.DataView), so a new threshold - from the caller or the page's own
+    slider - doesn't need new edge data.
+    
+    With precomputed_layout, graphs of more than PRECOMPUTED_LAYOUT_MIN_NODES nodes
+    (free-form layouts only) get x/y positions computed here and physics disabled,
+    so the browser doesn't have to stabilize them. The layout is cached per graph
+    structure, and the page's updateGraph() only applies it when the structure
+    changes (nodes the user dragged stay put).
+    
+    Nodes are sent column-wise ({'count': n, 'columns': {key: [values]}}, see
+    _columns()); the page rebuilds the node objects.
+    
+    Identical calls (e.g. Streamlit reruns) are served from a cache, so the
+    returned payload is shared and must not be modified.
     
     Returns:
-        HTML string containing the complete visualization
+        Dict with 'nodes', 'edges', 'options', 'keep_physics', 'min_edge_weight',
+        'max_edge_weight' (the range of the page's edge weight slider),
+        'structure_key' (a digest of the node ids and edge endpoints) and
+        'layout_key', which changes whenever the page has to lay the graph out
+        again (new structure, solver, theta or hierarchical direction)
     """
-    import json
-    
-    # Filter edges by weight/importance
-    filtered_edges = [e for e in edges if len(e.get('shared_features', [])) >= min_edge_weight]
-    
-    # Apply opacity to edge colors
-    def add_opacity_to_color(color_str, opacity):
-        """Convert hex color to rgba with opacity"""
-        if color_str.startswith('#'):
-            hex_color = color_str.lstrip('#')
-            r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-            return f'rgba({r}, {g}, {b}, {opacity})'
-        return color_str
-    
-    # Apply opacity to edges
-    edges_with_opacity = []
-    for edge in filtered_edges:
-        edge_copy = edge.copy()
-        if 'color' in edge_copy and edge_opacity < 1.0:
-            edge_copy['color'] = add_opacity_to_color(edge_copy['color'], edge_opacity)
-        if not show_edge_labels:
-            edge_copy['label'] = ''
-        edges_with_opacity.append(edge_copy)
-    
-    nodes_json = json.dumps(nodes)
-    edges_json = json.dumps(edges_with_opacity)
+    key = (_content_digest((nodes, edges)), physics_enabled, layout_algorithm, edge_smooth_type,
+           edge_opacity, min_edge_weight, show_edge_labels, use_hierarchical, stabilization_iterations,
+           solver_theta, precomputed_layout)
+    return _lru_cached(_GRAPH_CACHE, _GRAPH_CACHE_LOCK, _GRAPH_CACHE_SIZE, key, lambda: _build_graph(
+        nodes, edges, physics_enabled, layout_algorithm, edge_smooth_type, edge_opacity, min_edge_weight,
+        show_edge_labels, use_hierarchical, stabilization_iterations, solver_theta, precomputed_layout
+    ))
+
+
+def _build_graph(nodes, edges, physics_enabled, layout_algorithm, edge_smooth_type, edge_opacity,
+                 min_edge_weight, show_edge_labels, use_hierarchical, stabilization_iterations,
+                 solver_theta, precomputed_layout):
+    """Build the payload for get_visjs_graph() (uncached)."""
+    # Apply opacity/labels in one pass; an edge dict is only copied when it changes
+    recolor = edge_opacity < 1.0
+    rgba_colors = {}
+    if recolor:
+        rgba_colors = _rgba_colors({edge['color'] for edge in edges if 'color' in edge}, edge_opacity)
     
-    # Build legend HTML for edge colors (Apple-styled)
-    edge_legend_html = ""
-    if field_colors:
-        edge_legend_html = '<div style="margin-top: 16px; border-top: 1px solid rgba(0, 0, 0, 0.06); padding-top: 12px;">'
-        edge_legend_html += '<div style="font-weight: 600; margin-bottom: 12px; font-size: 13px; color: #1d1d1f;">Connection Types</div>'
+    if not recolor and show_edge_labels:
+        edges_out = list(edges)
+    else:
+        edges_out = []
+        for edge in edges:
+            if not show_edge_labels or (recolor and 'color' in edge):
+                edge = {**edge}
+                if recolor and 'color' in edge:
+                    edge['color'] = rgba_colors[edge['color']]
+                if not show_edge_labels:
+                    edge['label'] = ''
+            edges_out.append(edge)
+    
+    # Small graphs settle in far fewer iterations than the cap
+    stabilization_iterations = min(int(stabilization_iterations), 100 + 3 * len(nodes))
+    
+    options = _network_options(layout_algorithm, edge_smooth_type, use_hierarchical,
+                               stabilization_iterations, solver_theta)
+    
+    # Large graphs: let Vis.js skip redrawing every edge (node) on each pan/zoom frame
+    options['interaction']['hideEdgesOnDrag'] = len(edges) > HIDE_EDGES_MIN_EDGES
+    options['interaction']['hideEdgesOnZoom'] = len(edges) > HIDE_EDGES_MIN_EDGES
+    options['interaction']['hideNodesOnDrag'] = len(nodes) > HIDE_NODES_MIN_NODES
+    
+    structure = _structure_digest(nodes, edges)
+    layout_key = _content_digest((structure.hex(), layout_algorithm, solver_theta, use_hierarchical)).hex()
+    
+    # Large graphs: lay out server-side and ship the positions with physics off
+    positions = None
+    if precomputed_layout and not use_hierarchical and len(nodes) > PRECOMPUTED_LAYOUT_MIN_NODES:
+        try:
+            positions = _cached_positions(nodes, edges, structure)
+        except ImportError:  # networkx (or scipy for very large components) - the browser lays it out
+            positions = None
+    
+    node_columns = _columns(nodes)
+    if positions is not None:
+        xy = [positions[node_id] for node_id in node_columns['columns']['id']]
+        node_columns['columns']['x'] = [x for x, _ in xy]
+        node_columns['columns']['y'] = [y for _, y in xy]
+        options['physics']['enabled'] = False
+        options['layout']['improvedLayout'] = False
+        physics_enabled = False
+    
+    return {
+        'nodes': node_columns,
+        'edges': edges_out,
+        'options': options,
+        'keep_physics': bool(physics_enabled),
+        'min_edge_weight': int(min_edge_weight),
+        'max_edge_weight': max((len(edge.get('shared_features', ())) for edge in edges), default=1),
+        'structure_key': structure.hex(),
+        'layout_key': layout_key
+    }
+
+
+def _columns(items):
+    """
+    Lay a list of dicts out column-wise: {'count': n, 'columns': {key: [value per item]}}.
+    
+    Each key is sent once instead of once per item. Items without a key get None
+    in that column, which the page skips when rebuilding them (nodeRecords).
+    """
+    keys = dict.fromkeys(key for item in items for key in item)
+    return {
+        'count': len(items),
+        'columns': {key: [item.get(key) for item in items] for key in keys}
+    }
+
+
+def _rgba_colors(colors, opacity):
+    """
+    Map each color to its rgba form with the given opacity.
+    
+    All '#rrggbb' colors are decoded in one pass (a single hex buffer read as
+    uint8 r, g, b triples); anything else (named colors, rgba strings) is kept
+    unchanged.
+    """
+    colors = list(colors)
+    hex_colors = [c for c in colors if len(c) == 7 and c.startswith('#')]
+    rgba = {c: c for c in colors}
+    
+    if hex_colors:
+        channels = np.frombuffer(bytes.fromhex(''.join(c[1:] for c in hex_colors)), dtype=np.uint8)
+        for color, (r, g, b) in zip(hex_colors, channels.reshape(-1, 3).tolist()):
+            rgba[color] = f'rgba({r}, {g}, {b}, {opacity})'
+    
+    return rgba
+
+
+def _structure_digest(nodes, edges):
+    """Digest of the graph structure: node ids and edge endpoints (styling is ignored)."""
+    return _content_digest(([node['id'] for node in nodes], [(edge['from'], edge['to']) for edge in edges]))
+
+
+def _cached_positions(nodes, edges, structure):
+    """_precomputed_positions(), cached on the graph's _structure_digest()."""
+    return _lru_cached(_LAYOUT_CACHE, _LAYOUT_CACHE_LOCK, _LAYOUT_CACHE_SIZE, structure,
+                       lambda: _precomputed_positions(nodes, edges))
+
+
+def _precomputed_positions(nodes, edges):
+    """
+    Lay the graph out one connected component at a time.
+    
+    Small components (most fraud rings are a handful of clients) are placed on a
+    circle, larger ones get a networkx spring layout; the components are then
+    packed in rows, largest first. Returns {node id: (x, y)} in canvas pixels.
+    
+    Raises ImportError without networkx, or without scipy when a component is
+    too large for networkx's dense spring layout.
+    """
+    import networkx as nx
+    
+    graph = nx.Graph()
+    graph.add_nodes_from(node['id'] for node in nodes)
+    graph.add_edges_from((edge['from'], edge['to']) for edge in edges)
+    components = sorted(nx.connected_components(graph), key=len, reverse=True)
+    
+    layouts = []
+    for component in components:
+        ids = list(component)
+        n = len(ids)
+        if n <= _LAYOUT_CIRCLE_MAX_NODES:
+            # Circumference of about one spacing per node
+            angles = np.arange(n) * (2 * np.pi / n)
+            radius = _LAYOUT_NODE_SPACING * n / (2 * np.pi) if n > 1 else 0.0
+            xy = radius * np.column_stack((np.cos(angles), np.sin(angles)))
+        else:
+            pos = nx.spring_layout(graph.subgraph(ids), seed=0, scale=_LAYOUT_NODE_SPACING * math.sqrt(n) / 2)
+            xy = np.array([pos[node_id] for node_id in ids])
         
-        for field_name, color in field_colors.items():
-            display_name = field_name.replace('_', ' ').title()
-            edge_legend_html += f'''
-                <div class="legend-item">
-                    <div style="width: 32px; height: 2px; background-color: {color}; margin-right: 10px; border-radius: 1px; box-shadow: 0 1px 2px rgba(0, 0, 0, 0.06);"></div>
-                    <div class="legend-label" style="font-size: 12px;">{display_name}</div>
-                </div>
-            '''
+        # Half-width of the square the component occupies, with room for node labels
+        extent = float(np.abs(xy).max()) + _LAYOUT_NODE_SPACING / 2
+        layouts.append((ids, xy, extent))
+    
+    # Shelf packing into a roughly square block
+    row_width = math.sqrt(sum((2 * extent) ** 2 for _, _, extent in layouts))
+    positions = {}
+    x = y = row_height = 0.0
+    for ids, xy, extent in layouts:
+        size = 2 * extent
+        if x > 0 and x + size > row_width:
+            x, y, row_height = 0.0, y + row_height, 0.0
         
-        # Add multiple fields indicator
-        edge_legend_html += '''
-            <div class="legend-item">
-                <div style="width: 32px; height: 2px; background-color: #AF52DE; margin-right: 10px; border-radius: 1px; box-shadow: 0 1px 2px rgba(0, 0, 0, 0.06);"></div>
-                <div class="legend-label" style="font-size: 12px;">Multiple Fields</div>
-            </div>
-        '''
-        edge_legend_html += '</div>'
+        placed = np.rint(xy + (x + extent, y + extent)).astype(np.int64).tolist()
+        positions.update(zip(ids, placed))
+        
+        x += size
+        row_height = max(row_height, size)
+    
+    return positions
+
+
+def _to_json(value):
+    """Serialize to compact JSON (no whitespace keeps the payload shipped to the iframe small)."""
+    if orjson is not None:
+        # Also accepts numpy values and non-string keys straight from pandas-derived data
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(value, separators=(',', ':'))
+
+
+def _content_digest(value):
+    """Compact digest of a JSON-serializable value, used as a cache key."""
+    return hashlib.blake2b(_to_json(value).encode(), digest_size=16).digest()
+
+
+def _lru_cached(cache, lock, size, key, build):
+    """
+    Look key up in an LRU cache (an OrderedDict, least recently used first),
+    calling build() on a miss. The lock is not held while building, so two
+    threads may build the same value; the last one stored wins.
+    """
+    with lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            return value
+    
+    value = build()
+    
+    with lock:
+        cache[key] = value
+        while len(cache) > size:
+            cache.popitem(last=False)
+    
+    return value
+
+
+# Physics settings per Vis.js solver; only the active solver's block is sent.
+# barnesHut and forceAtlas2Based also get the caller's theta.
+_SOLVER_OPTIONS = {
+    'barnesHut': {
+        'gravitationalConstant': -8000,
+        'centralGravity': 0.05,
+        'springLength': 300,
+        'springConstant': 0.008,
+        'damping': 0.35,
+        'avoidOverlap': 1.0
+    },
+    'forceAtlas2Based': {
+        'gravitationalConstant': -100,
+        'centralGravity': 0.001,
+        'springLength': 250,
+        'springConstant': 0.03,
+        'damping': 0.6,
+        'avoidOverlap': 1.0
+    },
+    'repulsion': {
+        'centralGravity': 0.01,
+        'springLength': 350,
+        'springConstant': 0.02,
+        'nodeDistance': 250,
+        'damping': 0.15
+    },
+    'hierarchicalRepulsion': {
+        'centralGravity': 0.0,
+        'springLength': 120,
+        'springConstant': 0.008,
+        'nodeDistance': 170,
+        'damping': 0.12,
+        'avoidOverlap': 0.85
+    }
+}
+
+
+def _solver_options(layout_algorithm, solver_theta):
+    """Physics options block for the active solver only (e.g. {'barnesHut': {...}})."""
+    options = dict(_SOLVER_OPTIONS.get(layout_algorithm, {}))
+    if layout_algorithm in ('barnesHut', 'forceAtlas2Based'):
+        options = {'theta': solver_theta, **options}
+    return {layout_algorithm: options}
+
+
+def _network_options(layout_algorithm, edge_smooth_type, use_hierarchical, stabilization_iterations, solver_theta):
+    """Build the Vis.js network options dict."""
+    font_face = '-apple-system, BlinkMacSystemFont, SF Pro Display, Segoe UI, Arial'
+    
+    if use_hierarchical:
+        hierarchical = {
+            'enabled': True,
+            'levelSeparation': 250,
+            'nodeSpacing': 200,
+            'treeSpacing': 300,
+            'blockShifting': True,
+            'edgeMinimization': True,
+            'parentCentralization': True,
+            'direction': use_hierarchical,
+            'sortMethod': 'directed',
+            'shakeTowards': 'leaves'
+        }
     else:
-        # Default legend
-        edge_legend_html = '''
-            <div style="margin-top: 16px; border-top: 1px solid rgba(0, 0, 0, 0.06); padding-top: 12px;">
-                <div style="font-weight: 600; margin-bottom: 12px; font-size: 13px; color: #1d1d1f;">Connection Types</div>
-                <div class="legend-item">
-                    <div style="width: 32px; height: 2px; background-color: #8E8E93; margin-right: 10px; border-radius: 1px; box-shadow: 0 1px 2px rgba(0, 0, 0, 0.06);"></div>
-                    <div class="legend-label" style="font-size: 12px;">Connection</div>
-                </div>
-                <div class="legend-item">
-                    <div style="width: 32px; height: 2px; background-color: #AF52DE; margin-right: 10px; border-radius: 1px; box-shadow: 0 1px 2px rgba(0, 0, 0, 0.06);"></div>
-                    <div class="legend-label" style="font-size: 12px;">Multiple Fields</div>
-                </div>
-            </div>
-        '''
+        hierarchical = False
     
-    html = f"""
+    return {
+        'nodes': {
+            'shape': 'dot',
+            'size': 24,
+            'font': {
+                'size': 14,
+                'color': '#1d1d1f',
+                'face': font_face,
+                'bold': False,
+                'strokeWidth': 0
+            },
+            'borderWidth': 1.5,
+            'borderWidthSelected': 3,
+            'shadow': {
+                'enabled': True,
+                'color': 'rgba(0, 0, 0, 0.08)',
+                'size': 8,
+                'x': 0,
+                'y': 2
+            },
+            'scaling': {
+                'min': 24,
+                'max': 24
+            },
+            'shapeProperties': {
+                'borderRadius': 50
+            }
+        },
+        'edges': {
+            'font': {
+                'size': 11,
+                'align': 'middle',
+                'color': '#86868b',
+                'face': font_face
+            },
+            'smooth': {
+                'type': edge_smooth_type,
+                'roundness': 0.5,
+                'forceDirection': 'none'
+            },
+            'width': 1.5,
+            'selectionWidth': 2.5,
+            'hoverWidth': 2.5,
+            'shadow': {
+                'enabled': False
+            }
+        },
+        'physics': {
+            'enabled': True,
+            'stabilization': {
+                'enabled': True,
+                'iterations': int(stabilization_iterations),
+                'updateInterval': 20,
+                'fit': True
+            },
+            **_solver_options(layout_algorithm, solver_theta),
+            'minVelocity': 0.5,
+            'adaptiveTimestep': True,
+            'solver': layout_algorithm
+        },
+        'interaction': {
+            'hover': True,
+            'tooltipDelay': 150,
+            'navigationButtons': True,
+            'keyboard': True,
+            'dragNodes': True,
+            'dragView': True,
+            'zoomView': True,
+            'zoomSpeed': 0.8,
+            'hideEdgesOnDrag': False,
+            'hideEdgesOnZoom': False,
+            'hideNodesOnDrag': False
+        },
+        'layout': {
+            'improvedLayout': not use_hierarchical,
+            'hierarchical': hierarchical
+        },
+        'manipulation': {
+            'enabled': False
+        },
+        'configure': {
+            'enabled': False
+        }
+    }
+
+
+# Edge legend pieces (Apple-styled, see .edge-legend in visjs_template.css); {c} is the
+# line color, {n} the label
+_LEGEND_ITEM_FMT = '<div class="legend-item"><div class="legend-edge" style="background-color: {c};"></div><div class="legend-label">{n}</div></div>'
+_LEGEND_HEADER = '<div class="edge-legend"><div class="edge-legend-title">Connection Types</div>'
+_LEGEND_MULTIPLE_FIELDS = _LEGEND_ITEM_FMT.format(c='#AF52DE', n='Multiple Fields')
+_DEFAULT_LEGEND = (
+    _LEGEND_HEADER
+    + _LEGEND_ITEM_FMT.format(c='#8E8E93', n='Connection')
+    + _LEGEND_MULTIPLE_FIELDS
+    + '</div>'
+)
+
+
+# Page scaffold, parsed once at import; get_visjs_html() only fills in the ${...} fields
+_PAGE_TEMPLATE = string.Template("""
     <!DOCTYPE html>
     <html>
     <head>
         <script type="text/javascript" src="https://unpkg.com/vis-network/standalone/umd/vis-network.min.js"></script>
         <script src="https://cdnjs.cloudflare.com/ajax/libs/html2canvas/1.4.1/html2canvas.min.js"></script>
+        ${page_css}
         <style type="text/css">
-            body, html {{
-                margin: 0;
-                padding: 0;
-                width: 100%;
-                height: 100%;
-                font-family: -apple-system, BlinkMacSystemFont, 'SF Pro Display', 'Segoe UI', Roboto, sans-serif;
-            }}
-            
-            #mynetwork {{
-                width: 100%;
-                height: {height}px;
-                border: 1px solid #d2d2d7;
-                background: radial-gradient(ellipse at center, #ffffff 0%, #fafafa 100%);
-                position: relative;
-                border-radius: 12px;
-                overflow: hidden;
-                box-shadow: inset 0 0 60px rgba(0, 0, 0, 0.02);
-            }}
-            
-            #legend {{
-                position: absolute;
-                top: 70px;
-                right: 20px;
-                background: rgba(255, 255, 255, 0.95);
-                backdrop-filter: blur(20px);
-                -webkit-backdrop-filter: blur(20px);
-                border: 1px solid rgba(0, 0, 0, 0.04);
-                border-radius: 16px;
-                padding: 20px;
-                box-shadow: 0 4px 24px rgba(0, 0, 0, 0.08), 0 0 0 1px rgba(0, 0, 0, 0.04);
-                z-index: 1000;
-                transition: all 0.3s ease;
-            }}
-            
-            #legend:hover {{
-                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.12), 0 0 0 1px rgba(0, 0, 0, 0.04);
-            }}
-            
-            .legend-item {{
-                display: flex;
-                align-items: center;
-                margin: 10px 0;
-            }}
-            
-            .legend-color {{
-                width: 18px;
-                height: 18px;
-                border-radius: 50%;
-                margin-right: 12px;
-                border: 2px solid rgba(0, 0, 0, 0.1);
-                box-shadow: 0 1px 3px rgba(0, 0, 0, 0.08);
-            }}
-            
-            .legend-label {{
-                font-size: 13px;
-                font-weight: 400;
-                color: #1d1d1f;
-                letter-spacing: -0.08px;
-            }}
-            
-            #controls {{
-                position: absolute;
-                bottom: 20px;
-                left: 20px;
-                background: rgba(255, 255, 255, 0.95);
-                backdrop-filter: blur(20px);
-                -webkit-backdrop-filter: blur(20px);
-                border: 1px solid rgba(0, 0, 0, 0.04);
-                border-radius: 16px;
-                padding: 12px;
-                box-shadow: 0 4px 24px rgba(0, 0, 0, 0.08), 0 0 0 1px rgba(0, 0, 0, 0.04);
-                z-index: 1000;
-                display: flex;
-                gap: 8px;
-                transition: all 0.3s ease;
-            }}
-            
-            #controls:hover {{
-                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.12), 0 0 0 1px rgba(0, 0, 0, 0.04);
-            }}
-            
-            .control-btn {{
-                padding: 10px 18px;
-                background: linear-gradient(135deg, #0071e3 0%, #005bb5 100%);
-                color: white;
-                border: none;
-                border-radius: 10px;
-                cursor: pointer;
-                font-size: 13px;
-                font-weight: 500;
-                letter-spacing: -0.08px;
-                transition: all 0.2s ease;
-                box-shadow: 0 2px 8px rgba(0, 113, 227, 0.2);
-            }}
-            
-            .control-btn:hover {{
-                transform: translateY(-1px);
-                box-shadow: 0 4px 12px rgba(0, 113, 227, 0.3);
-                background: linear-gradient(135deg, #005bb5 0%, #004a99 100%);
-            }}
-            
-            .control-btn:active {{
-                transform: translateY(0);
-            }}
-            
-            #stats {{
-                position: absolute;
-                top: 70px;
-                left: 20px;
-                background: rgba(255, 255, 255, 0.95);
-                backdrop-filter: blur(20px);
-                -webkit-backdrop-filter: blur(20px);
-                border: 1px solid rgba(0, 0, 0, 0.04);
-                border-radius: 16px;
-                padding: 16px 20px;
-                box-shadow: 0 4px 24px rgba(0, 0, 0, 0.08), 0 0 0 1px rgba(0, 0, 0, 0.04);
-                z-index: 1000;
-                font-size: 13px;
-                transition: all 0.3s ease;
-            }}
-            
-            #stats:hover {{
-                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.12), 0 0 0 1px rgba(0, 0, 0, 0.04);
-            }}
-            
-            .stat-item {{
-                margin: 8px 0;
-                color: #1d1d1f;
-                letter-spacing: -0.08px;
-            }}
-            
-            .stat-item strong {{
-                font-weight: 600;
-                color: #1d1d1f;
-            }}
-            
-            #chart-title {{
-                position: absolute;
-                top: 0;
-                left: 0;
-                right: 0;
-                background: linear-gradient(135deg, #1d1d1f 0%, #2d2d2f 100%);
-                color: #F5F5F7;
-                font-family: -apple-system, BlinkMacSystemFont, 'SF Pro Display', 'Segoe UI', sans-serif;
-                font-size: 17px;
-                font-weight: 600;
-                text-align: center;
-                padding: 16px 24px;
-                z-index: 999;
-                letter-spacing: -0.3px;
-                border-bottom: 1px solid rgba(255, 255, 255, 0.1);
-                box-shadow: 0 2px 16px rgba(0, 0, 0, 0.15);
-            }}
-            
-            #mynetwork {{
-                margin-top: 52px;
-                position: relative;
-            }}
-            
-            #export-controls {{
-                position: absolute;
-                bottom: 20px;
-                right: 20px;
-                background: rgba(255, 255, 255, 0.95);
-                backdrop-filter: blur(20px);
-                -webkit-backdrop-filter: blur(20px);
-                border: 1px solid rgba(0, 0, 0, 0.04);
-                border-radius: 16px;
-                padding: 12px;
-                box-shadow: 0 4px 24px rgba(0, 0, 0, 0.08), 0 0 0 1px rgba(0, 0, 0, 0.04);
-                z-index: 1000;
-                transition: all 0.3s ease;
-            }}
-            
-            #export-controls:hover {{
-                box-shadow: 0 8px 32px rgba(0, 0, 0, 0.12), 0 0 0 1px rgba(0, 0, 0, 0.04);
-            }}
+            #mynetwork {
+                height: ${height}px;
+            }
         </style>
     </head>
     <body>
-        <div id="visualization-wrapper" style="position: relative; width: 100%; height: {height + 50}px; margin: 0; padding: 0;">
-            <div id="chart-title">{chart_title}</div>
+        <div id="visualization-wrapper" style="position: relative; width: 100%; height: ${wrapper_height}px; margin: 0; padding: 0;">
+            <div id="chart-title">${chart_title}</div>
             
             <div id="stats">
             <div class="stat-item"><strong>Nodes:</strong> <span id="node-count">0</span></div>
@@ -307,7 +499,7 @@ def get_visjs_html(nodes, edges, height=700, physics_enabled=True, field_colors=
                 <div class="legend-label">High Risk (3+ Types)</div>
             </div>
             
-            {edge_legend_html}
+            ${edge_legend_html}
         </div>
         
             <div id="mynetwork"></div>
@@ -317,6 +509,11 @@ def get_visjs_html(nodes, edges, height=700, physics_enabled=True, field_colors=
             <button class="control-btn" onclick="fitNetwork()">Fit View</button>
             <button class="control-btn" onclick="togglePhysics()">Toggle Physics</button>
             <button class="control-btn" onclick="resetSelection()">Reset Selection</button>
+            <label class="weight-control" title="Minimum number of shared fields per connection">
+                Min Fields
+                <input type="range" id="min-weight" min="1" max="1" step="1" value="1" oninput="setMinEdgeWeight(this.value)">
+                <span id="min-weight-value">1</span>
+            </label>
         </div>
         
         <div id="export-controls">
@@ -325,372 +522,91 @@ def get_visjs_html(nodes, edges, height=700, physics_enabled=True, field_colors=
         
         <script type="text/javascript">
             // Create nodes and edges
-            var nodes = new vis.DataSet({nodes_json});
-            var edges = new vis.DataSet({edges_json});
-            
-            // Create a network
-            var container = document.getElementById('mynetwork');
-            var data = {{
-                nodes: nodes,
-                edges: edges
-            }};
-            
-            var options = {{
-                nodes: {{
-                    shape: 'dot',
-                    size: 24,
-                    font: {{
-                        size: 14,
-                        color: '#1d1d1f',
-                        face: '-apple-system, BlinkMacSystemFont, SF Pro Display, Segoe UI, Arial',
-                        bold: false,
-                        strokeWidth: 0
-                    }},
-                    borderWidth: 1.5,
-                    borderWidthSelected: 3,
-                    shadow: {{
-                        enabled: true,
-                        color: 'rgba(0, 0, 0, 0.08)',
-                        size: 8,
-                        x: 0,
-                        y: 2
-                    }},
-                    scaling: {{
-                        min: 24,
-                        max: 24
-                    }},
-                    shapeProperties: {{
-                        borderRadius: 50
-                    }}
-                }},
-                edges: {{
-                    font: {{
-                        size: 11,
-                        align: 'middle',
-                        color: '#86868b',
-                        face: '-apple-system, BlinkMacSystemFont, SF Pro Display, Segoe UI, Arial'
-                    }},
-                    smooth: {{
-                        type: '{edge_smooth_type}',
-                        roundness: 0.5,
-                        forceDirection: 'none'
-                    }},
-                    width: 1.5,
-                    selectionWidth: 2.5,
-                    hoverWidth: 2.5,
-                    shadow: {{
-                        enabled: false
-                    }}
-                }},
-                physics: {{
-                    enabled: {str(physics_enabled).lower()},
-                    stabilization: {{
-                        enabled: true,
-                        iterations: 800,
-                        updateInterval: 20,
-                        fit: true
-                    }},
-                    barnesHut: {{
-                        gravitationalConstant: -8000,
-                        centralGravity: 0.05,
-                        springLength: 300,
-                        springConstant: 0.008,
-                        damping: 0.35,
-                        avoidOverlap: 1.0
-                    }},
-                    forceAtlas2Based: {{
-                        gravitationalConstant: -100,
-                        centralGravity: 0.001,
-                        springLength: 250,
-                        springConstant: 0.03,
-                        damping: 0.6,
-                        avoidOverlap: 1.0
-                    }},
-                    repulsion: {{
-                        centralGravity: 0.01,
-                        springLength: 350,
-                        springConstant: 0.02,
-                        nodeDistance: 250,
-                        damping: 0.15
-                    }},
-                    hierarchicalRepulsion: {{
-                        centralGravity: 0.0,
-                        springLength: 120,
-                        springConstant: 0.008,
-                        nodeDistance: 170,
-                        damping: 0.12,
-                        avoidOverlap: 0.85
-                    }},
-                    minVelocity: 0.5,
-                    solver: '{layout_algorithm}'
-                }},
-                interaction: {{
-                    hover: true,
-                    tooltipDelay: 150,
-                    navigationButtons: true,
-                    keyboard: true,
-                    dragNodes: true,
-                    dragView: true,
-                    zoomView: true,
-                    zoomSpeed: 0.8,
-                    hideEdgesOnDrag: false,
-                    hideEdgesOnZoom: false
-                }},
-                layout: {{
-                    improvedLayout: {str(not use_hierarchical).lower()},
-                    randomSeed: undefined,
-                    hierarchical: {f'''{{
-                        enabled: true,
-                        levelSeparation: 250,
-                        nodeSpacing: 200,
-                        treeSpacing: 300,
-                        blockShifting: true,
-                        edgeMinimization: true,
-                        parentCentralization: true,
-                        direction: '{use_hierarchical}',
-                        sortMethod: 'directed',
-                        shakeTowards: 'leaves'
-                    }}''' if use_hierarchical else 'false'}
-                }},
-                manipulation: {{
-                    enabled: false
-                }},
-                configure: {{
-                    enabled: false
-                }}
-            }};
-            
-            var network = new vis.Network(container, data, options);
-            var physicsEnabled = true;  // Always enable physics
-            var selectedNodes = [];
-            var highlightActive = false;
-            
-            // Update stats
-            document.getElementById('node-count').innerText = nodes.length;
-            document.getElementById('edge-count').innerText = edges.length;
-            
-            // Stabilization progress
-            network.on("stabilizationProgress", function(params) {{
-                var maxWidth = 200;
-                var widthFactor = params.iterations/params.total;
-                console.log("Stabilizing: " + Math.round(widthFactor * 100) + "%");
-            }});
-            
-            // When stabilized, keep physics enabled
-            network.on("stabilizationIterationsDone", function() {{
-                console.log("Stabilization complete! Physics remains enabled.");
-            }});
-            
-            // Node click event - highlight connections
-            network.on("click", function(params) {{
-                if (params.nodes.length > 0) {{
-                    var selectedNodeId = params.nodes[0];
-                    highlightConnections(selectedNodeId);
-                    document.getElementById('selected-node').innerText = 'Node ' + selectedNodeId;
-                }} else {{
-                    resetSelection();
-                }}
-            }});
-            
-            // Hover effects
-            network.on("hoverNode", function(params) {{
-                container.style.cursor = 'pointer';
-            }});
-            
-            network.on("blurNode", function(params) {{
-                container.style.cursor = 'default';
-            }});
-            
-            network.on("hoverEdge", function(params) {{
-                container.style.cursor = 'pointer';
-            }});
-            
-            network.on("blurEdge", function(params) {{
-                container.style.cursor = 'default';
-            }});
-            
-            // Double click to zoom to node
-            network.on("doubleClick", function(params) {{
-                if (params.nodes.length > 0) {{
-                    network.focus(params.nodes[0], {{
-                        scale: 1.5,
-                        animation: {{
-                            duration: 1000,
-                            easingFunction: 'easeInOutQuad'
-                        }}
-                    }});
-                }}
-            }});
-            
-            // Highlight connections function
-            function highlightConnections(nodeId) {{
-                highlightActive = true;
-                
-                // Get all connected edges
-                var connectedEdges = network.getConnectedEdges(nodeId);
-                var connectedNodes = network.getConnectedNodes(nodeId);
-                
-                // Update all nodes
-                var allNodes = nodes.get({{returnType: "Object"}});
-                for (var id in allNodes) {{
-                    if (id == nodeId) {{
-                        // Selected node
-                        allNodes[id].borderWidth = 6;
-                        allNodes[id].font = {{size: 16, bold: true}};
-                    }} else if (connectedNodes.indexOf(parseInt(id)) > -1) {{
-                        // Connected nodes
-                        allNodes[id].borderWidth = 4;
-                        allNodes[id].font = {{size: 14}};
-                    }} else {{
-                        // Other nodes - fade them
-                        allNodes[id].color = {{
-                            background: allNodes[id].color,
-                            border: '#cccccc'
-                        }};
-                        allNodes[id].font = {{size: 12, color: '#cccccc'}};
-                        allNodes[id].borderWidth = 1;
-                    }}
-                }}
-                
-                // Store original edge colors if not already stored
-                if (!window.originalEdgeColors) {{
-                    window.originalEdgeColors = {{}};
-                    var allEdges = edges.get();
-                    allEdges.forEach(function(edge) {{
-                        window.originalEdgeColors[edge.id] = edge.color || '#848484';
-                    }});
-                }}
-                
-                // Update all edges
-                var allEdges = edges.get({{returnType: "Object"}});
-                for (var id in allEdges) {{
-                    if (connectedEdges.indexOf(parseInt(id)) > -1) {{
-                        // Connected edges - highlight with original color but brighter
-                        allEdges[id].width = allEdges[id].width * 2;
-                        // Keep original color but make it stand out
-                        var origColor = window.originalEdgeColors[id] || '#848484';
-                        allEdges[id].color = {{color: origColor, opacity: 1}};
-                    }} else {{
-                        // Other edges - fade
-                        allEdges[id].color = {{color: '#cccccc', opacity: 0.2}};
-                    }}
-                }}
-                
-                nodes.update(Object.values(allNodes));
-                edges.update(Object.values(allEdges));
-            }}
-            
-            // Reset selection
-            function resetSelection() {{
-                if (!highlightActive) return;
-                
-                highlightActive = false;
-                document.getElementById('selected-node').innerText = 'None';
-                
-                // Reset all nodes
-                var allNodes = nodes.get({{returnType: "Object"}});
-                for (var id in allNodes) {{
-                    allNodes[id].borderWidth = 2;
-                    allNodes[id].font = {{size: 14, color: '#000000'}};
-                    delete allNodes[id].color.border;
-                }}
-                
-                // Reset all edges to original colors
-                var allEdges = edges.get({{returnType: "Object"}});
-                for (var id in allEdges) {{
-                    // Restore original color
-                    var origColor = window.originalEdgeColors[id] || '#848484';
-                    allEdges[id].color = origColor;
-                    // Reset width if it was modified
-                    if (allEdges[id].width > 10) {{
-                        allEdges[id].width = allEdges[id].width / 2;
-                    }}
-                }}
-                
-                nodes.update(Object.values(allNodes));
-                edges.update(Object.values(allEdges));
-            }}
-            
-            // Control functions
-            function fitNetwork() {{
-                network.fit({{
-                    animation: {{
-                        duration: 1000,
-                        easingFunction: 'easeInOutQuad'
-                    }}
-                }});
-            }}
-            
-            function togglePhysics() {{
-                physicsEnabled = !physicsEnabled;
-                network.setOptions({{ physics: physicsEnabled }});
-                console.log("Physics: " + (physicsEnabled ? "ON" : "OFF"));
-            }}
-            
-            // Export function (can be called from parent)
-            function exportNetwork() {{
-                return {{
-                    nodes: nodes.get(),
-                    edges: edges.get()
-                }};
-            }}
-            
-            // Export PNG function - captures entire visualization as you see it
-            function exportPNG() {{
-                try {{
-                    // Hide export button temporarily
-                    const exportControls = document.getElementById('export-controls');
-                    exportControls.style.display = 'none';
-                    
-                    // Use html2canvas to capture the entire visualization wrapper as user sees it
-                    const visualizationWrapper = document.getElementById('visualization-wrapper');
-                    
-                    html2canvas(visualizationWrapper, {{
-                        backgroundColor: '#fafafa',
-                        scale: 2,  // Higher quality
-                        logging: false,
-                        useCORS: true,
-                        allowTaint: true
-                    }}).then(function(canvas) {{
-                        // Add timestamp
-                        const ctx = canvas.getContext('2d');
-                        const now = new Date();
-                        const timestamp = now.toISOString().replace('T', ' ').substring(0, 19);
-                        
-                        ctx.fillStyle = '#666666';
-                        ctx.font = '24px Arial, sans-serif';
-                        ctx.textAlign = 'right';
-                        ctx.fillText('Generated: ' + timestamp, canvas.width - 20, canvas.height - 20);
-                        
-                        // Download
-                        const link = document.createElement('a');
-                        const fileTimestamp = now.toISOString().replace(/[:.]/g, '-').slice(0, -5);
-                        link.download = 'fraud-network-' + fileTimestamp + '.png';
-                        link.href = canvas.toDataURL('image/png');
-                        link.click();
-                        
-                        // Restore export button
-                        exportControls.style.display = 'block';
-                    }}).catch(function(error) {{
-                        console.error('Export error:', error);
-                        alert('Export failed: ' + error.message);
-                        exportControls.style.display = 'block';
-                    }});
-                    
-                }} catch (e) {{
-                    console.error('Export setup error:', e);
-                    alert('Export failed: ' + e.message);
-                }}
-            }}
-            
-            // Initial fit
-            setTimeout(function() {{
-                fitNetwork();
-            }}, 100);
+            var graph = ${graph_json};
         </script>
+        ${page_js}
     </body>
     </html>
+    """)
+
+
+def get_visjs_html(nodes, edges, height=700, physics_enabled=True, field_colors=None, chart_title="Fraud Ring Network", 
+                   layout_algorithm="forceAtlas2Based", edge_smooth_type="continuous", edge_opacity=1.0, 
+                   min_edge_weight=1, show_edge_labels=True, use_hierarchical=False,
+                   stabilization_iterations=800, solver_theta=0.5, precomputed_layout=True,
+                   inline_assets=True):
     """
+    Generate HTML template with Vis.js network visualization.
+    
+    Args:
+        nodes: List of node dictionaries
+        edges: List of edge dictionaries
+        height: Height of the visualization in pixels
+        physics_enabled: Whether to keep physics running after the initial stabilization
+        field_colors: Optional dict mapping field names to colors for legend
+        chart_title: Title displayed at top of chart
+        layout_algorithm: Physics layout algorithm (barnesHut, forceAtlas2Based, repulsion, hierarchicalRepulsion)
+        edge_smooth_type: Edge smoothing type (dynamic, continuous, discrete, diagonalCross, straightCross, horizontal, vertical, curvedCW, curvedCCW, cubicBezier)
+        edge_opacity: Edge opacity (0.0-1.0)
+        min_edge_weight: Minimum edge weight to display (edges are filtered in the browser)
+        show_edge_labels: Whether to show edge labels
+        use_hierarchical: Hierarchical direction (UD, DU, LR, RL) or False for free-form
+        stabilization_iterations: Max physics iterations for the initial stabilization
+            (further capped at 100 + 3 per node)
+        solver_theta: Barnes-Hut approximation (barnesHut/forceAtlas2Based), higher is faster but less accurate
+        precomputed_layout: Lay out graphs larger than PRECOMPUTED_LAYOUT_MIN_NODES server-side
+        inline_assets: Embed the page CSS/JS; otherwise link visjs_template.css/.js relative to
+            the page URL (e.g. when served from the visjs_component directory)
+    
+    Returns:
+        HTML string containing the complete visualization
+    """
+    # Identical re-renders (e.g. repeated standalone exports) are served from the cache
+    key = (_content_digest((nodes, edges, field_colors)), height, physics_enabled, chart_title,
+           layout_algorithm, edge_smooth_type, edge_opacity, min_edge_weight, show_edge_labels,
+           use_hierarchical, stabilization_iterations, solver_theta, precomputed_layout, inline_assets)
+    return _lru_cached(_HTML_CACHE, _HTML_CACHE_LOCK, _HTML_CACHE_SIZE, key, lambda: _render_html(
+        nodes, edges, height, physics_enabled, field_colors, chart_title, layout_algorithm,
+        edge_smooth_type, edge_opacity, min_edge_weight, show_edge_labels, use_hierarchical,
+        stabilization_iterations, solver_theta, precomputed_layout, inline_assets
+    ))
+
+
+def _render_html(nodes, edges, height, physics_enabled, field_colors, chart_title, layout_algorithm,
+                 edge_smooth_type, edge_opacity, min_edge_weight, show_edge_labels, use_hierarchical,
+                 stabilization_iterations, solver_theta, precomputed_layout, inline_assets):
+    """Build the page for get_visjs_html() (uncached)."""
+    graph = get_visjs_graph(
+        nodes, edges, physics_enabled=physics_enabled, layout_algorithm=layout_algorithm,
+        edge_smooth_type=edge_smooth_type, edge_opacity=edge_opacity, min_edge_weight=min_edge_weight,
+        show_edge_labels=show_edge_labels, use_hierarchical=use_hierarchical,
+        stabilization_iterations=stabilization_iterations, solver_theta=solver_theta,
+        precomputed_layout=precomputed_layout
+    )
+    
+    graph_json = _to_json(graph)
+    
+    # Build legend HTML for edge colors (Apple-styled)
+    if field_colors:
+        items = ''.join(_LEGEND_ITEM_FMT.format(c=color, n=field_name.replace('_', ' ').title())
+                        for field_name, color in field_colors.items())
+        edge_legend_html = _LEGEND_HEADER + items + _LEGEND_MULTIPLE_FIELDS + '</div>'
+    else:
+        edge_legend_html = _DEFAULT_LEGEND
+    
+    if inline_assets:
+        page_css = '<style type="text/css">\n' + _PAGE_CSS + '</style>'
+        page_js = '<script type="text/javascript">\n' + _PAGE_JS + '</script>'
+    else:
+        # Cached by the browser instead of being resent with every page
+        page_css = '<link rel="stylesheet" type="text/css" href="visjs_template.css">'
+        page_js = '<script type="text/javascript" src="visjs_template.js"></script>'
+    
+    html = _PAGE_TEMPLATE.substitute(
+        height=height, wrapper_height=height + 50, chart_title=chart_title,
+        edge_legend_html=edge_legend_html, graph_json=graph_json,
+        page_css=page_css, page_js=page_js
+    )
     
     return html
 